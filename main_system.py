@@ -2,105 +2,1161 @@ import sqlite3
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import seaborn as sns
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, date
 import os
+import re
+import json
+import io
+import hashlib
+import queue
+import asyncio
+from urllib.parse import urlsplit, parse_qs
+from urllib.request import pathname2url
+import html
+import unicodedata
+import heapq
+import uuid
+import argparse
+import gzip
+import shutil
+import time
 import subprocess
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
+from tkinter import ttk, messagebox, filedialog, simpledialog
 import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 class DebateTeamManagementSystem:
-    def __init__(self, db_name="debate_team.db"):
+    # 数据库结构版本（PRAGMA user_version）
+    SCHEMA_VERSION = 7
+    # 日期以 1970-01-01 起的天数（epoch-day）存储
+    EPOCH = date(1970, 1, 1)
+    RESULTS = ['Win', 'Loss', 'Draw']
+    ROLES = ['一辩', '二辩', '三辩', '四辩', '自由辩']
+    EXPERIENCE_LEVELS = ['初级', '中级', '高级']
+    # 评分分布直方图：0-10 分按 0.1 分一档，分位数误差不超过一档
+    SCORE_BINS = 100
+    SCORE_MAX = 10.0
+    # 分数格式: "3:1"、"3-1"、"3比1"
+    SCORE_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*(?:[:：\-]|比)\s*(\d+(?:\.\d+)?)\s*$')
+    # 归档库与主库共有的列（主库另有同步用的 uid 列）
+    HISTORY_COLUMNS = {
+        'matches': 'id, match_day, opponent, tournament, result_code, score_for, score_against, score_text',
+        'match_participation': 'id, member_id, match_id, role_code, performance_score',
+        'schedule': 'id, day, time_slot, activity, assigned_member_id',
+    }
+    # 变更日志覆盖的表：逻辑表名 -> (数据表, 行内容 JSON 表达式)
+    # 枚举以文本、外键以 uid 记录，不同数据库之间可直接交换
+    SYNC_TABLES = {
+        'members': ('members_data', """json_object(
+            'name', {row}.name,
+            'position', (SELECT label FROM role_codes WHERE code = {row}.position_code),
+            'join_day', {row}.join_day,
+            'experience_level', (SELECT label FROM experience_codes WHERE code = {row}.experience_code))"""),
+        'matches': ('matches_data', """json_object(
+            'match_day', {row}.match_day, 'opponent', {row}.opponent, 'tournament', {row}.tournament,
+            'result_code', {row}.result_code, 'score_for', {row}.score_for,
+            'score_against', {row}.score_against, 'score_text', {row}.score_text)"""),
+        'match_participation': ('match_participation_data', """json_object(
+            'member_uid', (SELECT uid FROM members_data WHERE id = {row}.member_id),
+            'match_uid', (SELECT uid FROM matches_data WHERE id = {row}.match_id),
+            'role', (SELECT label FROM role_codes WHERE code = {row}.role_code),
+            'performance_score', {row}.performance_score)"""),
+        'schedule': ('schedule_data', """json_object(
+            'day', {row}.day, 'time_slot', {row}.time_slot, 'activity', {row}.activity,
+            'member_uid', (SELECT uid FROM members_data WHERE id = {row}.assigned_member_id))"""),
+    }
+    # 近期状态记录的场次
+    RECENT_FORM_LENGTH = 5
+    # 由拆分后的数值列还原分数文本（matches_data 别名为 m）
+    SCORE_SQL = ("COALESCE(m.score_text, CASE WHEN m.score_for IS NOT NULL "
+                 "THEN printf('%g:%g', m.score_for, m.score_against) END)")
+    
+    def __init__(self, db_name="debate_team.db", read_only=False):
         self.db_name = db_name
-        self.conn = sqlite3.connect(self.db_name)
+        self.read_only = read_only
+        if read_only:
+            # 只读连接供统计服务的线程池使用，不做结构升级
+            uri = f"file:{pathname2url(os.path.abspath(db_name))}?mode=ro"
+            self.conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            # uri=True 使 ATTACH 可使用 file:...?mode=ro 只读挂载归档
+            self.conn = sqlite3.connect(self.db_name, uri=True)
+        # 归档库没有 opponent_id 列，查询归档时在 SQL 中按规范化名称筛选对手
+        self.conn.create_function('normalize_opponent', 1, self.normalize_opponent, deterministic=True)
         self.cursor = self.conn.cursor()
-        self.initialize_database()
+        self._label_codes = {}
+        self.migration_report = None
+        self.last_backup_report = None
+        self.last_backup_error = None
+        self.last_simulation_result = None
+        self.last_simulation_error = None
+        self._stats_cube = None
+        self._participation_index = None
+        self.missing_archives = []
+        if read_only:
+            if self.conn.execute('PRAGMA user_version').fetchone()[0] < self.SCHEMA_VERSION:
+                raise ValueError("数据库结构版本过旧，请先以读写方式打开一次完成升级")
+        else:
+            self.initialize_database()
+            # 启动时裁剪所有对端都已收到的变更日志，保持主库小
+            self.prune_change_log()
+        self.node_id = self.conn.execute("SELECT value FROM sync_meta WHERE key = 'node_id'").fetchone()[0]
     
     def initialize_database(self):
-        """初始化数据库表"""
+        """初始化数据库表，旧版文本结构会自动迁移到紧凑类型结构"""
+        version = self.conn.execute('PRAGMA user_version').fetchone()[0]
+        if version >= self.SCHEMA_VERSION:
+            return
+        
+        if version == 0:
+            legacy = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name='members'"
+            ).fetchone()
+            if legacy:
+                self.migration_report = self.migrate_to_typed_schema()
+                print("数据库结构已迁移:", self.migration_report)
+                if self.migration_report['unparsed_values']:
+                    print("以下旧数据无法识别，已存为空值，请手动修正:", self.migration_report['unparsed_values'])
+            else:
+                self._run_schema_step(1, self._create_typed_schema)
+        
+        # 逐版本升级
+        schema_steps = [
+            (2, self._create_season_tables),
+            (3, self._create_change_log),
+            (4, self._create_history_tables),
+            (5, self._create_opponent_index),
+            (6, self._create_score_distribution),
+            (7, self._create_row_versions),
+        ]
+        for target, step in schema_steps:
+            if version < target:
+                self._run_schema_step(target, step)
+        
+        # 挂载归档需在事务之外，对手汇总在结构升级后单独重建
+        if version < 5:
+            self.rebuild_opponent_index()
+        if version < 6:
+            self.rebuild_score_distribution()
+    
+    def _run_schema_step(self, target_version, step):
+        """在单个事务中执行一次结构升级并更新版本号"""
+        self.conn.execute('BEGIN')
+        try:
+            step()
+            self.conn.execute(f'PRAGMA user_version = {target_version}')
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+    
+    def _create_typed_schema(self):
+        """创建紧凑类型表、枚举查找表、索引和兼容视图"""
+        # 枚举查找表
+        for table, labels in (('result_codes', self.RESULTS),
+                              ('role_codes', self.ROLES),
+                              ('experience_codes', self.EXPERIENCE_LEVELS)):
+            self.cursor.execute(f'''
+                CREATE TABLE IF NOT EXISTS {table} (
+                    code INTEGER PRIMARY KEY,
+                    label TEXT NOT NULL UNIQUE
+                )
+            ''')
+            self.cursor.executemany(
+                f'INSERT OR IGNORE INTO {table} (code, label) VALUES (?, ?)',
+                [(i + 1, label) for i, label in enumerate(labels)]
+            )
+        
         # 队员信息表
         self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS members (
+            CREATE TABLE IF NOT EXISTS members_data (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 name TEXT NOT NULL,
-                position TEXT,
-                join_date DATE,
-                experience_level TEXT
+                position_code INTEGER REFERENCES role_codes(code),
+                join_day INTEGER,
+                experience_code INTEGER REFERENCES experience_codes(code)
             )
         ''')
         
-        # 比赛记录表
+        self._create_history_tables()
+        
+        # 兼容视图：保持旧表名和文本列，原有查询无需修改
+        self.cursor.execute('''
+            CREATE VIEW IF NOT EXISTS members AS
+            SELECT
+                m.id,
+                m.name,
+                p.label AS position,
+                date(m.join_day * 86400, 'unixepoch') AS join_date,
+                e.label AS experience_level
+            FROM members_data m
+            LEFT JOIN role_codes p ON m.position_code = p.code
+            LEFT JOIN experience_codes e ON m.experience_code = e.code
+        ''')
+        self.cursor.execute(f'''
+            CREATE VIEW IF NOT EXISTS matches AS
+            SELECT
+                m.id,
+                date(m.match_day * 86400, 'unixepoch') AS date,
+                m.opponent,
+                m.tournament,
+                r.label AS result,
+                {self.SCORE_SQL} AS score
+            FROM matches_data m
+            LEFT JOIN result_codes r ON m.result_code = r.code
+        ''')
         self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS matches (
+            CREATE VIEW IF NOT EXISTS match_participation AS
+            SELECT
+                mp.id,
+                mp.member_id,
+                mp.match_id,
+                r.label AS role,
+                mp.performance_score
+            FROM match_participation_data mp
+            LEFT JOIN role_codes r ON mp.role_code = r.code
+        ''')
+        self.cursor.execute('''
+            CREATE VIEW IF NOT EXISTS schedule AS
+            SELECT
+                s.id,
+                date(s.day * 86400, 'unixepoch') AS date,
+                s.time_slot,
+                s.activity,
+                s.assigned_member_id
+            FROM schedule_data s
+        ''')
+    
+    def _create_season_tables(self):
+        """创建赛季登记表，记录已归档赛季及其归档文件"""
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS seasons (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date DATE NOT NULL,
+                name TEXT NOT NULL UNIQUE,
+                start_day INTEGER NOT NULL,
+                end_day INTEGER NOT NULL,
+                archive_file TEXT NOT NULL,
+                archived_at TEXT
+            )
+        ''')
+    
+    def _create_change_log(self):
+        """创建只追加的变更日志、同步状态表，并在四张数据表上安装触发器
+        
+        已有数据获得由本地 id 派生的 uid（init-表名-id），复制得到的副本 uid 相同，无需写入日志。
+        """
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS sync_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        ''')
+        self.cursor.execute("INSERT OR IGNORE INTO sync_meta (key, value) VALUES ('node_id', ?)",
+                            (uuid.uuid4().hex,))
+        self.cursor.execute("INSERT OR IGNORE INTO sync_meta (key, value) VALUES ('capture', '1')")
+        
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS change_log (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                table_name TEXT NOT NULL,
+                row_uid TEXT NOT NULL,
+                op TEXT NOT NULL CHECK(op IN ('U', 'D')),
+                changed_at REAL NOT NULL,
+                origin TEXT NOT NULL,
+                row_data TEXT
+            )
+        ''')
+        
+        # 每个对端已发送到的日志序号
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS sync_state (
+                peer_id TEXT PRIMARY KEY,
+                last_sent_seq INTEGER NOT NULL,
+                last_sync_at TEXT
+            )
+        ''')
+        
+        now = "(julianday('now') - 2440587.5) * 86400.0"
+        node = "(SELECT value FROM sync_meta WHERE key = 'node_id')"
+        capture = "(SELECT value FROM sync_meta WHERE key = 'capture') = '1'"
+        for name, (table, payload) in self.SYNC_TABLES.items():
+            columns = [row[1] for row in self.conn.execute(f'PRAGMA table_info({table})')]
+            if 'uid' not in columns:
+                self.cursor.execute(f'ALTER TABLE {table} ADD COLUMN uid TEXT')
+            self.cursor.execute(f"UPDATE {table} SET uid = 'init-{name}-' || id WHERE uid IS NULL")
+            self.cursor.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_uid ON {table}(uid)')
+            
+            self.cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_insert AFTER INSERT ON {table}
+                BEGIN
+                    UPDATE {table} SET uid = lower(hex(randomblob(8))) WHERE id = NEW.id AND uid IS NULL;
+                    INSERT INTO change_log (table_name, row_uid, op, changed_at, origin, row_data)
+                    SELECT '{name}', t.uid, 'U', {now}, {node}, {payload.format(row='NEW')}
+                    FROM {table} t WHERE t.id = NEW.id AND {capture};
+                END
+            ''')
+            # 插入触发器补写 uid 时 OLD.uid 为 NULL，不重复记录
+            self.cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_update AFTER UPDATE ON {table}
+                WHEN OLD.uid IS NOT NULL
+                BEGIN
+                    INSERT INTO change_log (table_name, row_uid, op, changed_at, origin, row_data)
+                    SELECT '{name}', NEW.uid, 'U', {now}, {node}, {payload.format(row='NEW')}
+                    WHERE {capture};
+                END
+            ''')
+            self.cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_delete AFTER DELETE ON {table}
+                BEGIN
+                    INSERT INTO change_log (table_name, row_uid, op, changed_at, origin, row_data)
+                    SELECT '{name}', OLD.uid, 'D', {now}, {node}, NULL
+                    WHERE {capture};
+                END
+            ''')
+    
+    def _create_row_versions(self):
+        """每行最新一次修改的 (时间戳, 来源)，冲突判断只查此表，变更日志因此可以裁剪
+        
+        删除的行保留为 op='D' 的墓碑，归档的行保留为 op='A' 的墓碑（不同步给对端）。
+        旧版本写入的 init 基线日志不再需要，一并删除。
+        """
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS row_versions (
+                table_name TEXT NOT NULL,
+                row_uid TEXT NOT NULL,
+                changed_at REAL NOT NULL,
+                origin TEXT NOT NULL,
+                op TEXT NOT NULL,
+                PRIMARY KEY (table_name, row_uid)
+            ) WITHOUT ROWID
+        ''')
+        self.cursor.execute('''
+            INSERT OR REPLACE INTO row_versions (table_name, row_uid, changed_at, origin, op)
+            SELECT table_name, row_uid, changed_at, origin, op FROM change_log
+            WHERE origin != 'init'
+            ORDER BY changed_at, origin
+        ''')
+        self.cursor.execute("DELETE FROM change_log WHERE origin = 'init'")
+        self.cursor.execute('DROP INDEX IF EXISTS idx_change_log_row')
+        self.cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_change_log_version AFTER INSERT ON change_log
+            BEGIN
+                INSERT INTO row_versions (table_name, row_uid, changed_at, origin, op)
+                VALUES (NEW.table_name, NEW.row_uid, NEW.changed_at, NEW.origin, NEW.op)
+                ON CONFLICT(table_name, row_uid) DO UPDATE SET
+                    changed_at = excluded.changed_at, origin = excluded.origin, op = excluded.op
+                WHERE (excluded.changed_at, excluded.origin) > (changed_at, origin);
+            END
+        ''')
+        # 已裁剪到的日志序号，对端落后于此时改为发送全量快照
+        self.cursor.execute("INSERT OR IGNORE INTO sync_meta (key, value) VALUES ('log_pruned_seq', '0')")
+    
+    def _create_opponent_index(self):
+        """创建规范化的对手维度表及其预计算汇总"""
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS opponents (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                normalized_name TEXT NOT NULL UNIQUE,
+                matches INTEGER NOT NULL DEFAULT 0,
+                wins INTEGER NOT NULL DEFAULT 0,
+                losses INTEGER NOT NULL DEFAULT 0,
+                draws INTEGER NOT NULL DEFAULT 0,
+                scored_matches INTEGER NOT NULL DEFAULT 0,
+                margin_sum REAL NOT NULL DEFAULT 0,
+                best_margin REAL,
+                worst_margin REAL,
+                last_match_day INTEGER,
+                recent_form TEXT NOT NULL DEFAULT ''
+            )
+        ''')
+        # 每名队员对阵每个对手的出场和评分
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS opponent_member_stats (
+                opponent_id INTEGER NOT NULL,
+                member_id INTEGER NOT NULL,
+                appearances INTEGER NOT NULL DEFAULT 0,
+                scored INTEGER NOT NULL DEFAULT 0,
+                score_sum REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (opponent_id, member_id)
+            ) WITHOUT ROWID
+        ''')
+        
+        columns = [row[1] for row in self.conn.execute('PRAGMA table_info(matches_data)')]
+        if 'opponent_id' not in columns:
+            self.cursor.execute('ALTER TABLE matches_data ADD COLUMN opponent_id INTEGER REFERENCES opponents(id)')
+        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_matches_opponent_id ON matches_data(opponent_id, match_day)')
+        self.cursor.execute("INSERT OR IGNORE INTO sync_meta (key, value) VALUES ('opponent_index_stale', '0')")
+    
+    def _create_score_distribution(self):
+        """创建每名队员的评分分布汇总：Welford 运行均值与平方差和，以及定宽直方图"""
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS member_score_stats (
+                member_id INTEGER PRIMARY KEY REFERENCES members_data(id),
+                scored INTEGER NOT NULL DEFAULT 0,
+                mean REAL NOT NULL DEFAULT 0,
+                m2 REAL NOT NULL DEFAULT 0,
+                histogram BLOB NOT NULL
+            ) WITHOUT ROWID
+        ''')
+        self.cursor.execute("INSERT OR IGNORE INTO sync_meta (key, value) VALUES ('score_stats_stale', '0')")
+    
+    def _create_history_tables(self, schema='main'):
+        """创建比赛、出战和排班表（主库或赛季归档库共用同一结构）
+        
+        日期列允许为空：旧版数据中无法识别的日期迁移后存为 NULL。
+        """
+        # 比赛记录表
+        self.cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {schema}.matches_data (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                match_day INTEGER,
                 opponent TEXT NOT NULL,
                 tournament TEXT,
-                result TEXT CHECK(result IN ('Win', 'Loss', 'Draw')),
-                score TEXT
+                result_code INTEGER REFERENCES result_codes(code),
+                score_for REAL,
+                score_against REAL,
+                score_text TEXT
             )
         ''')
         
         # 出战记录表
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS match_participation (
+        self.cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {schema}.match_participation_data (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 member_id INTEGER,
                 match_id INTEGER,
-                role TEXT,
+                role_code INTEGER REFERENCES role_codes(code),
                 performance_score REAL,
-                FOREIGN KEY (member_id) REFERENCES members(id),
-                FOREIGN KEY (match_id) REFERENCES matches(id)
+                FOREIGN KEY (member_id) REFERENCES members_data(id),
+                FOREIGN KEY (match_id) REFERENCES matches_data(id)
             )
         ''')
         
         # 排班表
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS schedule (
+        self.cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {schema}.schedule_data (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date DATE NOT NULL,
+                day INTEGER,
                 time_slot TEXT,
                 activity TEXT,
                 assigned_member_id INTEGER,
-                FOREIGN KEY (assigned_member_id) REFERENCES members(id)
+                FOREIGN KEY (assigned_member_id) REFERENCES members_data(id)
             )
         ''')
         
-        self.conn.commit()
+        # 索引
+        self.cursor.execute(f'CREATE INDEX IF NOT EXISTS {schema}.idx_matches_day ON matches_data(match_day)')
+        self.cursor.execute(f'CREATE INDEX IF NOT EXISTS {schema}.idx_participation_member ON match_participation_data(member_id)')
+        self.cursor.execute(f'CREATE INDEX IF NOT EXISTS {schema}.idx_participation_match ON match_participation_data(match_id)')
+        self.cursor.execute(f'CREATE INDEX IF NOT EXISTS {schema}.idx_schedule_day ON schedule_data(day)')
+        # 报表筛选用的复合索引
+        self.cursor.execute(f'CREATE INDEX IF NOT EXISTS {schema}.idx_matches_tournament ON matches_data(tournament, match_day)')
+        self.cursor.execute(f'CREATE INDEX IF NOT EXISTS {schema}.idx_matches_opponent ON matches_data(opponent, match_day)')
+        self.cursor.execute(f'CREATE INDEX IF NOT EXISTS {schema}.idx_schedule_member ON schedule_data(assigned_member_id, day)')
+    
+    # 旧版数据中可识别的日期写法（旧版界面不校验日期格式）
+    LEGACY_DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%Y.%m.%d", "%Y年%m月%d日", "%Y%m%d",
+                           "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y/%m/%d %H:%M:%S")
+    
+    def migrate_to_typed_schema(self):
+        """将旧版文本结构迁移到紧凑类型结构，返回迁移前后的大小（表和索引分开统计）和报表耗时
+        
+        无法识别的日期存为 NULL，原值列在返回结果的 unparsed_values 中，迁移不会中断。
+        """
+        before_size = self.database_size()
+        before_objects = self.object_sizes()
+        before_latency = self.measure_report_latency(typed=False)
+        unparsed = []
+        
+        def legacy_date(table, id_, column, value):
+            try:
+                return self._parse_legacy_date(value)
+            except ValueError:
+                unparsed.append({'table': table, 'id': id_, 'column': column, 'value': value})
+                return None
+        
+        legacy_tables = ['members', 'matches', 'match_participation', 'schedule']
+        rows = {table: self.conn.execute(f'SELECT * FROM {table}').fetchall()
+                for table in legacy_tables}
+        
+        self.conn.execute('BEGIN')
+        try:
+            for table in legacy_tables:
+                self.cursor.execute(f'ALTER TABLE {table} RENAME TO legacy_{table}')
+            self._create_typed_schema()
+            
+            self.cursor.executemany('''
+                INSERT INTO members_data (id, name, position_code, join_day, experience_code)
+                VALUES (?, ?, ?, ?, ?)
+            ''', [(id_, name, self._encode_label('role_codes', position),
+                   legacy_date('members', id_, 'join_date', join_date),
+                   self._encode_label('experience_codes', level))
+                  for id_, name, position, join_date, level in rows['members']])
+            
+            match_rows = []
+            for id_, match_date, opponent, tournament, result, score in rows['matches']:
+                score_for, score_against, score_text = self._parse_score(score)
+                match_rows.append((id_, legacy_date('matches', id_, 'date', match_date), opponent, tournament,
+                                   self._encode_result(result), score_for, score_against, score_text))
+            self.cursor.executemany('''
+                INSERT INTO matches_data (id, match_day, opponent, tournament, result_code,
+                                          score_for, score_against, score_text)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', match_rows)
+            
+            self.cursor.executemany('''
+                INSERT INTO match_participation_data (id, member_id, match_id, role_code, performance_score)
+                VALUES (?, ?, ?, ?, ?)
+            ''', [(id_, member_id, match_id, self._encode_label('role_codes', role), score)
+                  for id_, member_id, match_id, role, score in rows['match_participation']])
+            
+            self.cursor.executemany('''
+                INSERT INTO schedule_data (id, day, time_slot, activity, assigned_member_id)
+                VALUES (?, ?, ?, ?, ?)
+            ''', [(id_, legacy_date('schedule', id_, 'date', day), time_slot, activity, member_id)
+                  for id_, day, time_slot, activity, member_id in rows['schedule']])
+            
+            for table in legacy_tables:
+                self.cursor.execute(f'DROP TABLE legacy_{table}')
+            self.conn.execute('PRAGMA user_version = 1')
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            self._label_codes.clear()
+            raise
+        
+        self.conn.execute('VACUUM')
+        after_objects = self.object_sizes()
+        return {
+            'size_before_bytes': before_size,
+            'size_after_bytes': self.database_size(),
+            # 新增索引会使总大小变大，表数据和索引分开列出
+            'tables_before_bytes': before_objects and before_objects['tables'],
+            'indexes_before_bytes': before_objects and before_objects['indexes'],
+            'tables_after_bytes': after_objects and after_objects['tables'],
+            'indexes_after_bytes': after_objects and after_objects['indexes'],
+            'latency_before_ms': before_latency,
+            'latency_after_compat_ms': self.measure_report_latency(typed=False),
+            'latency_after_typed_ms': self.measure_report_latency(typed=True),
+            'unparsed_values': unparsed,
+        }
+    
+    def database_size(self):
+        """数据库文件占用的字节数"""
+        page_count = self.conn.execute('PRAGMA page_count').fetchone()[0]
+        page_size = self.conn.execute('PRAGMA page_size').fetchone()[0]
+        return page_count * page_size
+    
+    def object_sizes(self):
+        """按 dbstat 统计表和索引各占的字节数；SQLite 未编译 dbstat 时返回 None"""
+        try:
+            rows = self.conn.execute('''
+                SELECT s.type, SUM(d.pgsize)
+                FROM dbstat d JOIN sqlite_master s ON s.name = d.name
+                WHERE s.type IN ('table', 'index')
+                GROUP BY s.type
+            ''').fetchall()
+        except sqlite3.OperationalError:
+            return None
+        sizes = dict(rows)
+        return {'tables': sizes.get('table', 0), 'indexes': sizes.get('index', 0)}
+    
+    def measure_report_latency(self, typed=True, repeats=5):
+        """测量队员统计和比赛统计报表的平均耗时（毫秒）
+        
+        typed=False 时使用旧版文本查询（迁移前读旧表，迁移后读兼容视图）
+        """
+        timings = {}
+        if typed:
+            reports = {'member_stats': self.get_member_stats,
+                       'match_statistics': self.get_match_statistics}
+        else:
+            def legacy_member_stats():
+                return pd.read_sql_query('''
+                    SELECT m.id, m.name, m.position, m.experience_level,
+                           COUNT(mp.id) as matches_played,
+                           AVG(mp.performance_score) as avg_performance,
+                           SUM(CASE WHEN ma.result = 'Win' THEN 1 ELSE 0 END) as wins
+                    FROM members m
+                    LEFT JOIN match_participation mp ON m.id = mp.member_id
+                    LEFT JOIN matches ma ON mp.match_id = ma.id
+                    GROUP BY m.id
+                ''', self.conn)
+            
+            def legacy_match_statistics():
+                df = pd.read_sql_query('''
+                    SELECT m.date, m.opponent, m.tournament, m.result, m.score,
+                           COUNT(mp.id) as participants_count,
+                           AVG(mp.performance_score) as avg_performance
+                    FROM matches m
+                    LEFT JOIN match_participation mp ON m.id = mp.match_id
+                    GROUP BY m.id
+                    ORDER BY m.date DESC
+                ''', self.conn)
+                df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d', errors='coerce')
+                return df
+            
+            reports = {'member_stats': legacy_member_stats,
+                       'match_statistics': legacy_match_statistics}
+        
+        for name, report in reports.items():
+            start = time.perf_counter()
+            for _ in range(repeats):
+                report()
+            timings[name] = (time.perf_counter() - start) * 1000 / repeats
+        return timings
+    
+    def _encode_date(self, value):
+        """日期字符串转为 epoch-day 整数"""
+        if value is None or value == '':
+            return None
+        if isinstance(value, datetime):
+            value = value.date()
+        elif not isinstance(value, date):
+            value = datetime.strptime(str(value).strip(), "%Y-%m-%d").date()
+        return (value - self.EPOCH).days
+    
+    def _parse_legacy_date(self, value):
+        """宽松解析旧版日期文本，支持 LEGACY_DATE_FORMATS 中的写法，无法识别时抛出 ValueError"""
+        if value is None or str(value).strip() == '':
+            return None
+        text = str(value).strip()
+        for fmt in self.LEGACY_DATE_FORMATS:
+            try:
+                return self._encode_date(datetime.strptime(text, fmt))
+            except ValueError:
+                continue
+        raise ValueError(f"无法识别的日期: {value}")
+    
+    def _decode_date(self, day):
+        """epoch-day 整数转为日期字符串"""
+        if day is None:
+            return None
+        return (self.EPOCH + timedelta(days=int(day))).strftime("%Y-%m-%d")
+    
+    def _encode_label(self, table, label):
+        """枚举文本转为查找表中的整数编码，未知取值自动登记"""
+        if label is None or label == '':
+            return None
+        cache = self._label_codes.setdefault(table, {})
+        code = cache.get(label)
+        if code is None:
+            self.conn.execute(f'INSERT OR IGNORE INTO {table} (label) VALUES (?)', (label,))
+            code = self.conn.execute(f'SELECT code FROM {table} WHERE label = ?', (label,)).fetchone()[0]
+            cache[label] = code
+        return code
+    
+    def _encode_result(self, result):
+        """比赛结果只允许 Win/Loss/Draw"""
+        if result is None or result == '':
+            return None
+        if result not in self.RESULTS:
+            raise ValueError(f"无效的比赛结果: {result}")
+        return self.RESULTS.index(result) + 1
+    
+    def _parse_score(self, score):
+        """拆分分数为 (己方, 对方, 原文)，无法解析或格式不规范时保留原文"""
+        if score is None or str(score).strip() == '':
+            return None, None, None
+        score = str(score)
+        match = self.SCORE_PATTERN.match(score)
+        if not match:
+            return None, None, score
+        score_for, score_against = float(match.group(1)), float(match.group(2))
+        text = None if score == f'{score_for:g}:{score_against:g}' else score
+        return score_for, score_against, text
     
     def add_member(self, name, position, join_date, experience_level):
         """添加队员"""
+        position_code = self._encode_label('role_codes', position)
+        join_day = self._encode_date(join_date)
+        experience_code = self._encode_label('experience_codes', experience_level)
         self.cursor.execute('''
-            INSERT INTO members (name, position, join_date, experience_level)
+            INSERT INTO members_data (name, position_code, join_day, experience_code)
             VALUES (?, ?, ?, ?)
-        ''', (name, position, join_date, experience_level))
+        ''', (name, position_code, join_day, experience_code))
         self.conn.commit()
         return self.cursor.lastrowid
     
     def add_match(self, date, opponent, tournament, result, score):
         """添加比赛记录"""
+        match_day = self._encode_date(date)
+        result_code = self._encode_result(result)
+        score_for, score_against, score_text = self._parse_score(score)
+        opponent_id = self._opponent_id(opponent)
         self.cursor.execute('''
-            INSERT INTO matches (date, opponent, tournament, result, score)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (date, opponent, tournament, result, score))
+            INSERT INTO matches_data (match_day, opponent, tournament, result_code,
+                                      score_for, score_against, score_text, opponent_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (match_day, opponent, tournament, result_code, score_for, score_against, score_text, opponent_id))
+        match_id = self.cursor.lastrowid
+        self._update_opponent_record(opponent_id, match_day, result_code, score_for, score_against)
         self.conn.commit()
-        return self.cursor.lastrowid
+        return match_id
     
     def record_participation(self, member_id, match_id, role, performance_score):
         """记录队员出战情况"""
+        self._insert_participation(member_id, match_id, role, performance_score)
+        self.conn.commit()
+        self._participation_recorded(member_id, match_id, role, performance_score)
+    
+    def record_match_participations(self, match_id, entries):
+        """整场录入：entries 为 (member_id, role, performance_score) 列表，在单个事务中保存
+        
+        同一队员在同一场比赛中已有记录或在本批中重复出现时抛出 ValueError，不写入任何数据。
+        返回新记录的 id 列表。
+        """
+        duplicates = self.find_duplicate_participations(match_id, [entry[0] for entry in entries])
+        if duplicates:
+            member_ids = dict.fromkeys(str(entries[index][0]) for index in duplicates)
+            raise ValueError(f"以下队员在该场比赛中已有出战记录或重复录入: {', '.join(member_ids)}")
+        
+        self.conn.execute('BEGIN')
+        try:
+            ids = [self._insert_participation(member_id, match_id, role, performance_score)
+                   for member_id, role, performance_score in entries]
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        
+        for member_id, role, performance_score in entries:
+            self._participation_recorded(member_id, match_id, role, performance_score)
+        return ids
+    
+    def find_duplicate_participations(self, match_id, member_ids):
+        """用内存中的 (队员, 比赛) 索引查找重复录入，返回重复项在 member_ids 中的位置
+        
+        该场已有记录的队员每次出现都算重复；本次重复填写的队员只标出第二次及之后的出现。
+        """
+        if self._participation_index is None:
+            self._participation_index = set(self.conn.execute(
+                'SELECT member_id, match_id FROM match_participation_data'
+            ).fetchall())
+        
+        seen = set()
+        duplicates = []
+        for index, member_id in enumerate(member_ids):
+            if (member_id, match_id) in self._participation_index or member_id in seen:
+                duplicates.append(index)
+            seen.add(member_id)
+        return duplicates
+    
+    def _insert_participation(self, member_id, match_id, role, performance_score):
+        """写入一条出战记录并累加对手汇总（不提交）"""
+        role_code = self._encode_label('role_codes', role)
         self.cursor.execute('''
-            INSERT INTO match_participation (member_id, match_id, role, performance_score)
+            INSERT INTO match_participation_data (member_id, match_id, role_code, performance_score)
             VALUES (?, ?, ?, ?)
-        ''', (member_id, match_id, role, performance_score))
-        self.conn.commit()
+        ''', (member_id, match_id, role_code, performance_score))
+        participation_id = self.cursor.lastrowid
+        self.conn.execute('''
+            INSERT INTO opponent_member_stats (opponent_id, member_id, appearances, scored, score_sum)
+            SELECT opponent_id, ?, 1, ?, ? FROM matches_data WHERE id = ? AND opponent_id IS NOT NULL
+            ON CONFLICT(opponent_id, member_id) DO UPDATE SET
+                appearances = appearances + 1,
+                scored = scored + excluded.scored,
+                score_sum = score_sum + excluded.score_sum
+        ''', (member_id, int(performance_score is not None), performance_score or 0.0, match_id))
+        if performance_score is not None:
+            self._update_score_distribution(member_id, performance_score)
+        return participation_id
+    
+    def _score_bin(self, score):
+        """评分所在的直方图档位，超出 0-10 的评分计入两端"""
+        return min(max(int(score * self.SCORE_BINS / self.SCORE_MAX), 0), self.SCORE_BINS - 1)
+    
+    def _update_score_distribution(self, member_id, score):
+        """把一条评分累加到队员的运行方差和直方图（不提交）"""
+        row = self.conn.execute('SELECT scored, mean, m2, histogram FROM member_score_stats WHERE member_id = ?',
+                                (member_id,)).fetchone()
+        if row is None:
+            scored, mean, m2 = 0, 0.0, 0.0
+            histogram = np.zeros(self.SCORE_BINS, dtype=np.int32)
+        else:
+            scored, mean, m2 = row[:3]
+            histogram = np.frombuffer(row[3], dtype=np.int32).copy()
+        
+        # Welford 单遍更新，避免平方和相减的精度损失
+        scored += 1
+        delta = score - mean
+        mean += delta / scored
+        m2 += delta * (score - mean)
+        histogram[self._score_bin(score)] += 1
+        self.conn.execute('''
+            INSERT OR REPLACE INTO member_score_stats (member_id, scored, mean, m2, histogram)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (member_id, scored, mean, m2, histogram.tobytes()))
+    
+    def _participation_recorded(self, member_id, match_id, role, performance_score):
+        """提交后增量更新内存中的重复索引和统计立方体"""
+        if self._participation_index is not None:
+            self._participation_index.add((member_id, match_id))
+        
+        # 已构建的统计立方体只需累加这一条
+        if self._stats_cube is not None:
+            match = self.conn.execute('SELECT tournament, match_day, result_code FROM matches_data WHERE id = ?',
+                                      (match_id,)).fetchone()
+            if match is not None:
+                tournament, match_day, result_code = match
+                self._stats_cube.add(member_id, role, tournament, (self._decode_date(match_day) or '')[:7],
+                                     performance_score, result_code == 1)
+    
+    def _invalidate_caches(self):
+        """批量修改数据后丢弃内存中的统计立方体和重复索引，下次使用时重建"""
+        self._stats_cube = None
+        self._participation_index = None
+    
+    def get_stats_cube(self):
+        """获取多维统计立方体，首次调用时构建，之后随 record_participation 增量更新"""
+        if self._stats_cube is None:
+            self._stats_cube = StatsCube.build(self.conn)
+        return self._stats_cube
+    
+    def build_stats_cube(self, include_archived=False, start_date=None, end_date=None,
+                         tournament=None, opponent=None, member_id=None):
+        """按筛选条件从数据库构建一个新的统计立方体（不缓存）
+        
+        用于内存立方体无法精确表达的筛选：对手、精确到日的日期范围和已归档赛季。
+        """
+        rows = []
+        for matches, participation, archived in self._report_sources(include_archived, start_date, end_date):
+            conditions, params = self._match_filters('ma', start_date, end_date, tournament, opponent,
+                                                     archived=archived)
+            if member_id:
+                conditions.append('mp.member_id = ?')
+                params.append(int(member_id))
+            query = StatsCube.ROW_SQL.format(participation=participation, matches=matches)
+            rows += self.conn.execute(query + self._where(conditions), params).fetchall()
+        return StatsCube.from_rows(rows)
+    
+    def recommend_lineups(self, k=3, match_date=None, half_life_days=180, exclude_member_ids=None):
+        """推荐一辩至四辩的前 k 个最优阵容
+        
+        指定 match_date 时，以该日为基准计算近期权重，并排除当天已排班其他活动的队员
+        （活动名称含"比赛"的排班视为为本场比赛安排，不影响出战）。
+        """
+        excluded = set(exclude_member_ids or [])
+        today = None
+        if match_date:
+            today = self._encode_date(match_date)
+            busy = self.conn.execute('''
+                SELECT assigned_member_id FROM schedule_data
+                WHERE day = ? AND assigned_member_id IS NOT NULL
+                  AND (activity IS NULL OR activity NOT LIKE '%比赛%')
+            ''', (today,)).fetchall()
+            excluded.update(row[0] for row in busy)
+        
+        member_ids = [row[0] for row in self.conn.execute('SELECT id FROM members_data')
+                      if row[0] not in excluded]
+        recommender = LineupRecommender.from_history(self.conn, member_ids, today, half_life_days)
+        return recommender.top_lineups(k)
+    
+    def fit_tournament_simulator(self, include_archived=False):
+        """用历史比赛拟合锦标赛模拟器，include_archived 为 True 时包含已归档赛季"""
+        matches, appearances = [], []
+        for matches_table, participation, _ in self._report_sources(include_archived):
+            matches += self.conn.execute(f'''
+                SELECT id, opponent, result_code FROM {matches_table}
+                WHERE result_code IS NOT NULL
+            ''').fetchall()
+            appearances += self.conn.execute(f'''
+                SELECT match_id, member_id FROM {participation} WHERE member_id IS NOT NULL
+            ''').fetchall()
+        return TournamentSimulator.fit(sorted(matches), appearances)
+    
+    def simulate_tournament(self, bracket, trials=200000, lineup_member_ids=None, seed=0, processes=None,
+                            include_archived=False):
+        """拟合历史实力后模拟淘汰赛对阵表，返回各队晋级/夺冠概率和每秒模拟次数"""
+        simulator = self.fit_tournament_simulator(include_archived)
+        return simulator.simulate(bracket, trials, lineup_member_ids, seed, processes=processes)
+    
+    def start_tournament_simulation(self, bracket, trials=200000, lineup_member_ids=None, callback=None,
+                                    seed=0, processes=None, include_archived=False):
+        """在当前线程拟合实力，在后台线程中模拟，完成后以 (结果, 异常) 调用 callback
+        
+        模拟只使用拟合好的数组，不访问数据库连接；结果同时保存在 last_simulation_result /
+        last_simulation_error 中，界面线程可轮询线程状态后读取。
+        """
+        simulator = self.fit_tournament_simulator(include_archived)
+        
+        def run():
+            result, error = None, None
+            try:
+                result = simulator.simulate(bracket, trials, lineup_member_ids, seed, processes=processes)
+            except Exception as e:
+                error = e
+            self.last_simulation_result, self.last_simulation_error = result, error
+            if callback is not None:
+                callback(result, error)
+        
+        self.last_simulation_result = self.last_simulation_error = None
+        thread = threading.Thread(target=run, name='debate-team-simulation', daemon=True)
+        thread.start()
+        return thread
+    
+    @staticmethod
+    def normalize_opponent(name):
+        """对手名称规范化：全角转半角、忽略大小写和空白"""
+        return ''.join(unicodedata.normalize('NFKC', name or '').casefold().split())
+    
+    def _opponent_id(self, name):
+        """取得对手编号，新对手自动登记"""
+        normalized = self.normalize_opponent(name)
+        row = self.conn.execute('SELECT id FROM opponents WHERE normalized_name = ?', (normalized,)).fetchone()
+        if row:
+            return row[0]
+        return self.conn.execute('INSERT INTO opponents (name, normalized_name) VALUES (?, ?)',
+                                 (name.strip(), normalized)).lastrowid
+    
+    def _update_opponent_record(self, opponent_id, match_day, result_code, score_for, score_against):
+        """新增一场比赛后累加对手汇总"""
+        (matches, wins, losses, draws, scored_matches, margin_sum, best_margin, worst_margin,
+         last_match_day, recent_form) = self.conn.execute('''
+            SELECT matches, wins, losses, draws, scored_matches, margin_sum, best_margin, worst_margin,
+                   last_match_day, recent_form
+            FROM opponents WHERE id = ?
+        ''', (opponent_id,)).fetchone()
+        
+        matches += 1
+        wins += result_code == 1
+        losses += result_code == 2
+        draws += result_code == 3
+        if score_for is not None and score_against is not None:
+            margin = score_for - score_against
+            scored_matches += 1
+            margin_sum += margin
+            best_margin = margin if best_margin is None else max(best_margin, margin)
+            worst_margin = margin if worst_margin is None else min(worst_margin, margin)
+        
+        if match_day is not None and (last_match_day is None or match_day >= last_match_day):
+            last_match_day = match_day
+            if result_code is not None:
+                recent_form = ('WLD'[result_code - 1] + recent_form)[:self.RECENT_FORM_LENGTH]
+        else:
+            # 补录较早（或日期未知）的比赛时按索引重取最近几场
+            results = self.conn.execute('''
+                SELECT result_code FROM matches_data
+                WHERE opponent_id = ? AND result_code IS NOT NULL
+                ORDER BY match_day DESC, id DESC
+                LIMIT ?
+            ''', (opponent_id, self.RECENT_FORM_LENGTH)).fetchall()
+            recent_form = ''.join('WLD'[row[0] - 1] for row in results)
+        
+        self.conn.execute('''
+            UPDATE opponents
+            SET matches = ?, wins = ?, losses = ?, draws = ?, scored_matches = ?, margin_sum = ?,
+                best_margin = ?, worst_margin = ?, last_match_day = ?, recent_form = ?
+            WHERE id = ?
+        ''', (matches, wins, losses, draws, scored_matches, margin_sum, best_margin, worst_margin,
+              last_match_day, recent_form, opponent_id))
+    
+    def rebuild_opponent_index(self):
+        """从全部历史（含已归档赛季）重建对手维度和汇总"""
+        history, appearances = [], []
+        for matches, participation, _ in self._report_sources(include_archived=True):
+            history += self.conn.execute(f'''
+                SELECT id, opponent, match_day, result_code, score_for, score_against FROM {matches}
+            ''').fetchall()
+            appearances += self.conn.execute(f'''
+                SELECT match_id, member_id, performance_score FROM {participation}
+                WHERE member_id IS NOT NULL
+            ''').fetchall()
+        # 与 ORDER BY match_day, id 相同：日期未知的比赛排在最前
+        history.sort(key=lambda row: (row[2] is not None, row[2] or 0, row[0]))
+        hot_ids = {row[0] for row in self.conn.execute('SELECT id FROM matches_data')}
+        
+        self.conn.execute('BEGIN')
+        try:
+            self._set_change_capture(False)
+            self.conn.execute('DELETE FROM opponent_member_stats')
+            self.conn.execute('DELETE FROM opponents')
+            self.conn.execute('UPDATE matches_data SET opponent_id = NULL')
+            
+            # 先按录入顺序登记，显示名称取最早录入的写法；再按日期顺序累加汇总
+            match_opponent = {}
+            for match_id, opponent, *_ in sorted(history):
+                match_opponent[match_id] = self._opponent_id(opponent)
+            
+            hot_updates = []
+            for match_id, opponent, match_day, result_code, score_for, score_against in history:
+                opponent_id = match_opponent[match_id]
+                if match_id in hot_ids:
+                    hot_updates.append((opponent_id, match_id))
+                self._update_opponent_record(opponent_id, match_day, result_code, score_for, score_against)
+            self.conn.executemany('UPDATE matches_data SET opponent_id = ? WHERE id = ?', hot_updates)
+            
+            member_stats = {}
+            for match_id, member_id, score in appearances:
+                if match_id not in match_opponent:
+                    continue
+                stats = member_stats.setdefault((match_opponent[match_id], member_id), [0, 0, 0.0])
+                stats[0] += 1
+                if score is not None:
+                    stats[1] += 1
+                    stats[2] += score
+            self.conn.executemany('''
+                INSERT INTO opponent_member_stats (opponent_id, member_id, appearances, scored, score_sum)
+                VALUES (?, ?, ?, ?, ?)
+            ''', [(opponent_id, member_id, *stats) for (opponent_id, member_id), stats in member_stats.items()])
+            
+            self.conn.execute("UPDATE sync_meta SET value = '0' WHERE key = 'opponent_index_stale'")
+            self._set_change_capture(True)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+    
+    def rebuild_score_distribution(self):
+        """从主库出战记录重建每名队员的评分分布汇总"""
+        rows = self.conn.execute('''
+            SELECT member_id, performance_score FROM match_participation_data
+            WHERE member_id IS NOT NULL AND performance_score IS NOT NULL
+            ORDER BY id
+        ''').fetchall()
+        
+        self.conn.execute('BEGIN')
+        try:
+            self.conn.execute('DELETE FROM member_score_stats')
+            for member_id, score in rows:
+                self._update_score_distribution(member_id, score)
+            self.conn.execute("UPDATE sync_meta SET value = '0' WHERE key = 'score_stats_stale'")
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+    
+    def get_score_distribution(self, include_archived=False, quantiles=(0.1, 0.5, 0.9), **filters):
+        """每名队员评分的标准差和分位数（p10/p50/p90），filters 同 get_member_stats
+        
+        不带筛选时直接读取随录入增量维护的汇总表，耗时只与队员人数有关；
+        带筛选或包含归档赛季时由 SQL 按档位聚合出直方图后用同样方法计算。
+        """
+        columns = ['score_std'] + [f'p{round(q * 100)}' for q in quantiles]
+        filters = {key: value for key, value in filters.items() if value}
+        if not include_archived and not filters:
+            stale = self.conn.execute("SELECT value FROM sync_meta WHERE key = 'score_stats_stale'").fetchone()
+            if stale and stale[0] == '1':
+                self.rebuild_score_distribution()
+            rows = self.conn.execute(
+                'SELECT member_id, scored, m2, histogram FROM member_score_stats ORDER BY member_id'
+            ).fetchall()
+            member_ids = [row[0] for row in rows]
+            scored = np.array([row[1] for row in rows], dtype=np.float64)
+            variance = np.array([row[2] for row in rows], dtype=np.float64) / np.maximum(scored, 1)
+            histograms = np.array([np.frombuffer(row[3], dtype=np.int32) for row in rows],
+                                  dtype=np.float64).reshape(len(rows), self.SCORE_BINS)
+        else:
+            bin_sql = (f'MIN(MAX(CAST(mp.performance_score * {self.SCORE_BINS} / {self.SCORE_MAX} AS INTEGER), 0), '
+                       f'{self.SCORE_BINS - 1})')
+            rows = []
+            for matches, participation, archived in self._report_sources(
+                    include_archived, filters.get('start_date'), filters.get('end_date')):
+                conditions, params = self._match_filters('ma', filters.get('start_date'), filters.get('end_date'),
+                                                         filters.get('tournament'), filters.get('opponent'),
+                                                         archived=archived)
+                conditions.append('mp.performance_score IS NOT NULL')
+                if filters.get('member_id'):
+                    conditions.append('mp.member_id = ?')
+                    params.append(int(filters['member_id']))
+                rows += self.conn.execute(f'''
+                    SELECT mp.member_id, {bin_sql} AS bin, COUNT(*), SUM(mp.performance_score),
+                           SUM(mp.performance_score * mp.performance_score)
+                    FROM {participation} mp
+                    LEFT JOIN {matches} ma ON mp.match_id = ma.id
+                    {self._where(conditions)}
+                    GROUP BY mp.member_id, bin
+                ''', params).fetchall()
+            member_ids = sorted({row[0] for row in rows})
+            position = {member_id: i for i, member_id in enumerate(member_ids)}
+            histograms = np.zeros((len(member_ids), self.SCORE_BINS))
+            sums = np.zeros((len(member_ids), 2))
+            for member_id, bin_index, count, score_sum, score_sq in rows:
+                histograms[position[member_id], bin_index] += count
+                sums[position[member_id]] += (score_sum, score_sq)
+            scored = histograms.sum(axis=1)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean = sums[:, 0] / scored
+                variance = np.maximum(sums[:, 1] / scored - mean * mean, 0.0)
+        
+        df = pd.DataFrame(self._histogram_quantiles(histograms, quantiles), columns=columns[1:])
+        df.insert(0, 'score_std', np.sqrt(variance))
+        df.insert(0, 'member_id', member_ids)
+        return df[scored > 0].reset_index(drop=True)
+    
+    def _histogram_quantiles(self, histograms, quantiles):
+        """按档位直方图（每行一名队员）估计分位数，档内按均匀分布线性插值"""
+        width = self.SCORE_MAX / self.SCORE_BINS
+        cumulative = np.cumsum(histograms, axis=1)
+        totals = cumulative[:, -1]
+        result = np.full((len(histograms), len(quantiles)), np.nan)
+        rows = np.arange(len(histograms))
+        for column, q in enumerate(quantiles):
+            target = q * totals
+            bins = np.minimum((cumulative < target[:, None]).sum(axis=1), self.SCORE_BINS - 1)
+            below = np.where(bins > 0, cumulative[rows, bins - 1], 0.0)
+            in_bin = histograms[rows, bins]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                fraction = np.where(in_bin > 0, (target - below) / in_bin, 0.5)
+            result[:, column] = np.where(totals > 0, (bins + fraction) * width, np.nan)
+        return result
+    
+    def get_scouting_report(self, opponent, top_members=3):
+        """对手情报：战绩、分差、近期状态和对阵该对手表现最好的队员
+        
+        直接读取预计算汇总，耗时与历史比赛数量无关。
+        """
+        stale = self.conn.execute("SELECT value FROM sync_meta WHERE key = 'opponent_index_stale'").fetchone()
+        if stale and stale[0] == '1':
+            self.rebuild_opponent_index()
+        
+        row = self.conn.execute('''
+            SELECT id, name, matches, wins, losses, draws, scored_matches, margin_sum,
+                   best_margin, worst_margin, last_match_day, recent_form
+            FROM opponents WHERE normalized_name = ?
+        ''', (self.normalize_opponent(opponent),)).fetchone()
+        if row is None:
+            return None
+        
+        (opponent_id, name, matches, wins, losses, draws, scored_matches, margin_sum,
+         best_margin, worst_margin, last_match_day, recent_form) = row
+        best = self.conn.execute('''
+            SELECT s.member_id, m.name, s.appearances, s.score_sum / s.scored as avg_performance
+            FROM opponent_member_stats s
+            JOIN members_data m ON s.member_id = m.id
+            WHERE s.opponent_id = ? AND s.scored > 0
+            ORDER BY avg_performance DESC, s.appearances DESC
+            LIMIT ?
+        ''', (opponent_id, top_members)).fetchall()
+        return {
+            'opponent': name,
+            'matches': matches,
+            'wins': wins,
+            'losses': losses,
+            'draws': draws,
+            'win_rate': wins / matches if matches else None,
+            'avg_margin': margin_sum / scored_matches if scored_matches else None,
+            'best_margin': best_margin,
+            'worst_margin': worst_margin,
+            'last_match_date': self._decode_date(last_match_day),
+            'recent_form': recent_form,
+            'best_members': [
+                {'member_id': member_id, 'name': member_name, 'appearances': count, 'avg_performance': avg}
+                for member_id, member_name, count, avg in best
+            ],
+        }
     
     def create_schedule(self, date, time_slot, activity, assigned_member_id):
         """创建排班表"""
+        day = self._encode_date(date)
         self.cursor.execute('''
-            INSERT INTO schedule (date, time_slot, activity, assigned_member_id)
+            INSERT INTO schedule_data (day, time_slot, activity, assigned_member_id)
             VALUES (?, ?, ?, ?)
-        ''', (date, time_slot, activity, assigned_member_id))
+        ''', (day, time_slot, activity, assigned_member_id))
         self.conn.commit()
     
     def get_all_members(self):
@@ -109,150 +1165,1785 @@ class DebateTeamManagementSystem:
         df = pd.read_sql_query(query, self.conn)
         return df
     
-    def get_all_matches(self):
-        """获取所有比赛信息"""
-        query = "SELECT * FROM matches"
-        df = pd.read_sql_query(query, self.conn)
-        return df
-    
-    def get_member_stats(self):
-        """获取队员统计数据"""
-        query = '''
-            SELECT 
+    def get_all_matches(self, start_date=None, end_date=None, tournament=None, opponent=None, member_id=None):
+        """获取比赛信息，可按日期范围、锦标赛、对手和队员筛选"""
+        conditions, params = self._match_filters('m', start_date, end_date, tournament, opponent, member_id)
+        query = f'''
+            SELECT
                 m.id,
-                m.name,
-                m.position,
-                m.experience_level,
-                COUNT(mp.id) as matches_played,
-                AVG(mp.performance_score) as avg_performance,
-                SUM(CASE WHEN ma.result = 'Win' THEN 1 ELSE 0 END) as wins
-            FROM members m
-            LEFT JOIN match_participation mp ON m.id = mp.member_id
-            LEFT JOIN matches ma ON mp.match_id = ma.id
-            GROUP BY m.id
+                date(m.match_day * 86400, 'unixepoch') as date,
+                m.opponent,
+                m.tournament,
+                r.label as result,
+                {self.SCORE_SQL} as score
+            FROM matches_data m
+            LEFT JOIN result_codes r ON m.result_code = r.code
+            {self._where(conditions)}
+            ORDER BY m.id
         '''
-        df = pd.read_sql_query(query, self.conn)
+        df = pd.read_sql_query(query, self.conn, params=params)
         return df
     
-    def get_schedule(self):
-        """获取排班表"""
-        query = '''
+    def get_tournaments(self):
+        """获取所有锦标赛名称"""
+        query = 'SELECT DISTINCT tournament FROM matches_data WHERE tournament IS NOT NULL ORDER BY tournament'
+        return [row[0] for row in self.conn.execute(query)]
+    
+    def get_opponents(self):
+        """获取所有对手名称"""
+        query = 'SELECT DISTINCT opponent FROM matches_data ORDER BY opponent'
+        return [row[0] for row in self.conn.execute(query)]
+    
+    def _match_filters(self, alias, start_date=None, end_date=None, tournament=None, opponent=None,
+                       member_id=None, participation='match_participation_data', archived=False):
+        """把筛选条件转为针对比赛表的 WHERE 条件，日期、锦标赛、对手、队员均可走索引
+        
+        archived 为 True 表示比赛表来自赛季归档（没有 opponent_id 列）。
+        """
+        conditions, params = [], []
+        if start_date:
+            conditions.append(f'{alias}.match_day >= ?')
+            params.append(self._encode_date(start_date))
+        if end_date:
+            conditions.append(f'{alias}.match_day <= ?')
+            params.append(self._encode_date(end_date))
+        if tournament:
+            conditions.append(f'{alias}.tournament = ?')
+            params.append(tournament)
+        if opponent:
+            # 与对手情报一致：按规范化后的对手编号筛选，忽略全半角、大小写和空白
+            normalized = self.normalize_opponent(opponent)
+            if archived:
+                conditions.append(f'normalize_opponent({alias}.opponent) = ?')
+                params.append(normalized)
+            else:
+                # 旧版本同步进来的比赛可能尚未登记 opponent_id，按名称补充匹配（只读连接无法重建对手维度）
+                conditions.append(f'''({alias}.opponent_id = (SELECT id FROM opponents WHERE normalized_name = ?)
+                                   OR ({alias}.opponent_id IS NULL AND normalize_opponent({alias}.opponent) = ?))''')
+                params += [normalized, normalized]
+        if member_id:
+            conditions.append(f'{alias}.id IN (SELECT match_id FROM {participation} WHERE member_id = ?)')
+            params.append(int(member_id))
+        return conditions, params
+    
+    def _where(self, conditions):
+        """拼接 WHERE 子句"""
+        return 'WHERE ' + ' AND '.join(conditions) if conditions else ''
+    
+    def get_member_stats(self, include_archived=False, start_date=None, end_date=None,
+                         tournament=None, opponent=None, member_id=None):
+        """获取队员统计数据，include_archived 为 True 时包含已归档赛季
+        
+        筛选条件先行过滤比赛和出战记录，按队员汇总后再与队员表连接，没有符合条件出战的队员计为 0 场。
+        """
+        member_condition, params = '', []
+        if member_id:
+            member_condition = 'WHERE id = ?'
+            params.append(int(member_id))
+        members = pd.read_sql_query(f'''
+            SELECT id, name, position, experience_level FROM members
+            {member_condition}
+            ORDER BY id
+        ''', self.conn, params=params)
+        
+        sums = self._member_sums(include_archived, start_date, end_date, tournament, opponent, member_id)
+        df = members.merge(sums, left_on='id', right_on='member_id', how='left')
+        df['matches_played'] = df['matches_played'].fillna(0).astype(int)
+        df['avg_performance'] = df['score_sum'] / df['scored'].where(df['scored'] > 0)
+        df['wins'] = df['wins'].fillna(0).astype(int)
+        return df[['id', 'name', 'position', 'experience_level', 'matches_played', 'avg_performance', 'wins']]
+    
+    def _member_sums(self, include_archived=False, start_date=None, end_date=None,
+                     tournament=None, opponent=None, member_id=None):
+        """每名队员符合筛选条件的出战次数、评分次数、评分和、评分平方和与胜场
+        
+        主库和每个归档赛季分别聚合，再按队员相加。
+        """
+        frames = []
+        for matches, participation, archived in self._report_sources(include_archived, start_date, end_date):
+            conditions, params = self._match_filters('ma', start_date, end_date, tournament, opponent,
+                                                     archived=archived)
+            if member_id:
+                conditions.append('mp.member_id = ?')
+                params.append(int(member_id))
+            frames.append(pd.read_sql_query(f'''
+                SELECT
+                    mp.member_id,
+                    COUNT(mp.id) as matches_played,
+                    COUNT(mp.performance_score) as scored,
+                    TOTAL(mp.performance_score) as score_sum,
+                    TOTAL(mp.performance_score * mp.performance_score) as score_sq,
+                    TOTAL(CASE WHEN ma.result_code = 1 THEN 1 ELSE 0 END) as wins
+                FROM {participation} mp
+                LEFT JOIN {matches} ma ON mp.match_id = ma.id
+                {self._where(conditions)}
+                GROUP BY mp.member_id
+            ''', self.conn, params=params))
+        return self._concat_sources(frames).groupby('member_id', as_index=False).sum()
+    
+    def get_match_statistics(self, include_archived=False, start_date=None, end_date=None,
+                             tournament=None, opponent=None, member_id=None):
+        """获取每场比赛的统计数据，include_archived 为 True 时包含已归档赛季
+        
+        出战人数和平均分使用按 match_id 的相关子查询，筛选条件可直接走比赛表索引。
+        """
+        frames = []
+        for matches, participation, archived in self._report_sources(include_archived, start_date, end_date):
+            conditions, params = self._match_filters('m', start_date, end_date, tournament, opponent,
+                                                     member_id, participation, archived)
+            frames.append(pd.read_sql_query(f'''
+                SELECT 
+                    m.match_day,
+                    m.opponent,
+                    m.tournament,
+                    r.label as result,
+                    {self.SCORE_SQL} as score,
+                    m.score_for,
+                    m.score_against,
+                    (SELECT COUNT(*) FROM {participation} mp WHERE mp.match_id = m.id) as participants_count,
+                    (SELECT AVG(mp.performance_score) FROM {participation} mp WHERE mp.match_id = m.id) as avg_performance
+                FROM {matches} m
+                LEFT JOIN result_codes r ON m.result_code = r.code
+                {self._where(conditions)}
+                ORDER BY m.match_day DESC
+            ''', self.conn, params=params))
+        df = self._concat_sources(frames)
+        df = df.sort_values('match_day', ascending=False, kind='stable').reset_index(drop=True)
+        # epoch-day 整数直接换算，无需逐行解析日期字符串
+        df.insert(0, 'date', pd.to_datetime(df.pop('match_day'), unit='D'))
+        return df
+    
+    def get_stat_partials(self, include_archived=False, start_date=None, end_date=None,
+                          tournament=None, opponent=None):
+        """队员统计和比赛汇总的可合并中间结果：只含计数与求和，不含平均值
+        
+        供多支队伍联合统计使用，多个数据库的结果直接相加后再求平均。
+        返回 {'members': 每名队员一行, 'matches': 每个 (锦标赛, 对手) 一行}。
+        """
+        members = pd.read_sql_query('SELECT id, name, position, experience_level FROM members ORDER BY id',
+                                    self.conn)
+        sums = self._member_sums(include_archived, start_date, end_date, tournament, opponent)
+        members = members.merge(sums, left_on='id', right_on='member_id', how='left').drop(columns='member_id')
+        for column in ('matches_played', 'scored', 'wins'):
+            members[column] = members[column].fillna(0).astype(int)
+        members[['score_sum', 'score_sq']] = members[['score_sum', 'score_sq']].fillna(0.0)
+        
+        frames = []
+        for matches, participation, archived in self._report_sources(include_archived, start_date, end_date):
+            conditions, params = self._match_filters('ma', start_date, end_date, tournament, opponent,
+                                                     archived=archived)
+            frames.append(pd.read_sql_query(f'''
+                SELECT
+                    ma.tournament,
+                    ma.opponent,
+                    COUNT(*) as matches,
+                    SUM(CASE WHEN ma.result_code = 1 THEN 1 ELSE 0 END) as wins,
+                    SUM(CASE WHEN ma.result_code = 2 THEN 1 ELSE 0 END) as losses,
+                    SUM(CASE WHEN ma.result_code = 3 THEN 1 ELSE 0 END) as draws,
+                    COUNT(ma.score_for) as scored_matches,
+                    TOTAL(ma.score_for) as points_for,
+                    TOTAL(ma.score_against) as points_against,
+                    TOTAL(p.participants) as participants,
+                    TOTAL(p.scored) as scored,
+                    TOTAL(p.score_sum) as score_sum
+                FROM {matches} ma
+                LEFT JOIN (
+                    SELECT match_id, COUNT(*) as participants, COUNT(performance_score) as scored,
+                           TOTAL(performance_score) as score_sum
+                    FROM {participation}
+                    GROUP BY match_id
+                ) p ON p.match_id = ma.id
+                {self._where(conditions)}
+                GROUP BY ma.tournament, ma.opponent
+            ''', self.conn, params=params))
+        match_totals = self._concat_sources(frames).groupby(
+            ['tournament', 'opponent'], dropna=False, sort=False, as_index=False).sum()
+        return {'members': members, 'matches': match_totals}
+    
+    def get_schedule(self, start_date=None, end_date=None, member_id=None):
+        """获取排班表，可按日期范围和负责人筛选"""
+        conditions, params = [], []
+        if start_date:
+            conditions.append('s.day >= ?')
+            params.append(self._encode_date(start_date))
+        if end_date:
+            conditions.append('s.day <= ?')
+            params.append(self._encode_date(end_date))
+        if member_id:
+            conditions.append('s.assigned_member_id = ?')
+            params.append(int(member_id))
+        
+        query = f'''
             SELECT 
-                s.date,
+                date(s.day * 86400, 'unixepoch') as date,
                 s.time_slot,
                 s.activity,
                 m.name as assigned_member
-            FROM schedule s
-            LEFT JOIN members m ON s.assigned_member_id = m.id
-            ORDER BY s.date
+            FROM schedule_data s
+            LEFT JOIN members_data m ON s.assigned_member_id = m.id
+            {self._where(conditions)}
+            ORDER BY s.day
         '''
-        df = pd.read_sql_query(query, self.conn)
+        df = pd.read_sql_query(query, self.conn, params=params)
         return df
     
     def update_member(self, member_id, name, position, join_date, experience_level):
         """更新队员信息"""
+        position_code = self._encode_label('role_codes', position)
+        join_day = self._encode_date(join_date)
+        experience_code = self._encode_label('experience_codes', experience_level)
         self.cursor.execute('''
-            UPDATE members 
-            SET name=?, position=?, join_date=?, experience_level=?
+            UPDATE members_data 
+            SET name=?, position_code=?, join_day=?, experience_code=?
             WHERE id=?
-        ''', (name, position, join_date, experience_level, member_id))
+        ''', (name, position_code, join_day, experience_code, member_id))
         self.conn.commit()
     
     def delete_member(self, member_id):
         """删除队员"""
         # 删除相关的出战记录
-        self.cursor.execute('DELETE FROM match_participation WHERE member_id=?', (member_id,))
+        self.cursor.execute('DELETE FROM match_participation_data WHERE member_id=?', (member_id,))
         # 删除相关的排班记录
-        self.cursor.execute('DELETE FROM schedule WHERE assigned_member_id=?', (member_id,))
+        self.cursor.execute('DELETE FROM schedule_data WHERE assigned_member_id=?', (member_id,))
+        self.cursor.execute('DELETE FROM opponent_member_stats WHERE member_id=?', (member_id,))
+        self.cursor.execute('DELETE FROM member_score_stats WHERE member_id=?', (member_id,))
         # 删除队员
-        self.cursor.execute('DELETE FROM members WHERE id=?', (member_id,))
+        self.cursor.execute('DELETE FROM members_data WHERE id=?', (member_id,))
         self.conn.commit()
+        self._invalidate_caches()
+    
+    def archive_season(self, name, start_date, end_date, archive_dir=None):
+        """归档已结束赛季：将该日期范围内的比赛、出战和排班记录移入独立的归档数据库文件"""
+        start_day = self._encode_date(start_date)
+        end_day = self._encode_date(end_date)
+        if start_day is None or end_day is None or end_day < start_day:
+            raise ValueError("赛季日期范围无效")
+        if self.conn.execute('SELECT 1 FROM seasons WHERE name = ?', (name,)).fetchone():
+            raise ValueError(f"赛季 {name} 已归档")
+        
+        if archive_dir is None:
+            archive_dir = os.getcwd() if self.db_name == ':memory:' else os.path.dirname(os.path.abspath(self.db_name))
+        base = 'debate_team' if self.db_name == ':memory:' else os.path.splitext(os.path.basename(self.db_name))[0]
+        safe_name = re.sub(r'[^\w-]+', '_', name)
+        archive_file = os.path.join(archive_dir, f"{base}_season_{safe_name}.db")
+        if os.path.exists(archive_file):
+            raise ValueError(f"归档文件已存在: {archive_file}")
+        
+        self.detach_season_archives()
+        self.conn.execute('ATTACH DATABASE ? AS season_archive', (archive_file,))
+        try:
+            self.conn.execute('BEGIN')
+            try:
+                # 归档只是本地搬移，不作为删除同步给其他副本
+                self._set_change_capture(False)
+                self._create_history_tables('season_archive')
+                
+                columns = self.HISTORY_COLUMNS
+                self.cursor.execute(f'''
+                    INSERT INTO season_archive.matches_data ({columns['matches']})
+                    SELECT {columns['matches']} FROM main.matches_data WHERE match_day BETWEEN ? AND ?
+                ''', (start_day, end_day))
+                moved_matches = self.cursor.rowcount
+                self.cursor.execute(f'''
+                    INSERT INTO season_archive.match_participation_data ({columns['match_participation']})
+                    SELECT {columns['match_participation']} FROM main.match_participation_data
+                    WHERE match_id IN (SELECT id FROM season_archive.matches_data)
+                ''')
+                moved_participation = self.cursor.rowcount
+                self.cursor.execute(f'''
+                    INSERT INTO season_archive.schedule_data ({columns['schedule']})
+                    SELECT {columns['schedule']} FROM main.schedule_data WHERE day BETWEEN ? AND ?
+                ''', (start_day, end_day))
+                moved_schedule = self.cursor.rowcount
+                
+                # 归档的行不再参与同步：删除其变更日志，版本记录改为 op='A' 的归档墓碑，
+                # 对端之后发来的同一行（包括全量快照）会被跳过，不会以新 id 重新插入主库
+                archived_at = time.time()
+                for log_name, table, condition, params in (
+                    ('match_participation', 'match_participation_data',
+                     'match_id IN (SELECT id FROM season_archive.matches_data)', ()),
+                    ('matches', 'matches_data', 'match_day BETWEEN ? AND ?', (start_day, end_day)),
+                    ('schedule', 'schedule_data', 'day BETWEEN ? AND ?', (start_day, end_day)),
+                ):
+                    self.cursor.execute(f'''
+                        DELETE FROM main.change_log
+                        WHERE table_name = ? AND row_uid IN (SELECT uid FROM main.{table} WHERE {condition})
+                    ''', (log_name, *params))
+                    self.cursor.execute(f'''
+                        INSERT INTO main.row_versions (table_name, row_uid, changed_at, origin, op)
+                        SELECT ?, uid, ?, ?, 'A' FROM main.{table} WHERE {condition}
+                        ON CONFLICT(table_name, row_uid) DO UPDATE SET op = 'A'
+                    ''', (log_name, archived_at, self.node_id, *params))
+                
+                self.cursor.execute('''
+                    DELETE FROM main.match_participation_data
+                    WHERE match_id IN (SELECT id FROM season_archive.matches_data)
+                ''')
+                self.cursor.execute('DELETE FROM main.matches_data WHERE match_day BETWEEN ? AND ?',
+                                    (start_day, end_day))
+                self.cursor.execute('DELETE FROM main.schedule_data WHERE day BETWEEN ? AND ?',
+                                    (start_day, end_day))
+                
+                self.cursor.execute('''
+                    INSERT INTO seasons (name, start_day, end_day, archive_file, archived_at)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (name, start_day, end_day, archive_file, datetime.now().isoformat(timespec='seconds')))
+                # 评分分布只统计主库中的出战，归档后在下次查询时重建
+                self.conn.execute("UPDATE sync_meta SET value = '1' WHERE key = 'score_stats_stale'")
+                self._set_change_capture(True)
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+        except Exception:
+            self.conn.execute('DETACH DATABASE season_archive')
+            os.remove(archive_file)
+            raise
+        self.conn.execute('DETACH DATABASE season_archive')
+        
+        self._invalidate_caches()
+        
+        # 回收空间，保持主库小而快
+        self.conn.execute('VACUUM')
+        return {
+            'season': name,
+            'archive_file': archive_file,
+            'matches': moved_matches,
+            'match_participation': moved_participation,
+            'schedule': moved_schedule,
+        }
+    
+    def get_seasons(self):
+        """获取已归档赛季列表"""
+        query = '''
+            SELECT
+                id,
+                name,
+                date(start_day * 86400, 'unixepoch') as start_date,
+                date(end_day * 86400, 'unixepoch') as end_date,
+                archive_file,
+                archived_at
+            FROM seasons
+            ORDER BY start_day
+        '''
+        df = pd.read_sql_query(query, self.conn)
+        return df
+    
+    def _report_sources(self, include_archived, start_date=None, end_date=None):
+        """逐个产出报表数据源 (比赛表, 出战表, 是否归档)：先是主库，再是与日期范围相交的归档赛季
+        
+        每次只以只读方式挂载一个归档文件，调用方查询完毕后即卸载，归档赛季再多也不受
+        SQLite 最多挂载 10 个数据库的限制；调用方在每个数据源上分别聚合，再把计数与求和相加。
+        归档文件缺失的赛季会被跳过并记录在 missing_archives 中。
+        """
+        yield 'matches_data', 'match_participation_data', False
+        if not include_archived:
+            return
+        
+        conditions, params = [], []
+        if start_date:
+            conditions.append('end_day >= ?')
+            params.append(self._encode_date(start_date))
+        if end_date:
+            conditions.append('start_day <= ?')
+            params.append(self._encode_date(end_date))
+        seasons = self.conn.execute(f'''
+            SELECT name, archive_file FROM seasons
+            {self._where(conditions)}
+            ORDER BY start_day
+        ''', params).fetchall()
+        
+        # 归档文件被移动或删除时跳过该赛季；只读挂载，避免 ATTACH 静默创建空文件
+        self.missing_archives = [name for name, archive_file in seasons if not os.path.exists(archive_file)]
+        if self.missing_archives:
+            print("以下赛季的归档文件不存在，已跳过:", ', '.join(self.missing_archives))
+        
+        self.detach_season_archives()
+        for _, archive_file in seasons:
+            if not os.path.exists(archive_file):
+                continue
+            uri = f"file:{pathname2url(os.path.abspath(archive_file))}?mode=ro"
+            self.conn.execute('ATTACH DATABASE ? AS season_archive', (uri,))
+            try:
+                yield 'season_archive.matches_data', 'season_archive.match_participation_data', True
+            finally:
+                self.conn.execute('DETACH DATABASE season_archive')
+    
+    @staticmethod
+    def _concat_sources(frames):
+        """合并各数据源的查询结果；空结果不参与合并，避免列类型退化为 object"""
+        non_empty = [frame for frame in frames if not frame.empty]
+        return pd.concat(non_empty or frames[:1], ignore_index=True)
+    
+    def detach_season_archives(self):
+        """卸载所有赛季归档"""
+        for _, alias, _ in self.conn.execute('PRAGMA database_list').fetchall():
+            if alias.startswith('season_'):
+                self.conn.execute(f'DETACH DATABASE {alias}')
+    
+    def backup_database(self, backup_dir=None, keep=7, pages=256, step_pause=0.005):
+        """在线备份：分页调用 SQLite backup API 生成快照，压缩保存并按数量保留
+        
+        每一步只在复制 pages 个页面期间持有源库的共享锁，步与步之间暂停 step_pause 秒让写入方提交。
+        返回吞吐量（MB/s）和写入方可能被阻塞的时间（单步最长/累计耗时）。
+        """
+        if self.db_name == ':memory:':
+            raise ValueError("内存数据库无法在线备份")
+        if backup_dir is None:
+            backup_dir = os.path.join(os.path.dirname(os.path.abspath(self.db_name)), 'backups')
+        os.makedirs(backup_dir, exist_ok=True)
+        
+        base = os.path.splitext(os.path.basename(self.db_name))[0]
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        snapshot_file = os.path.join(backup_dir, f"{base}_{stamp}.db")
+        archive_file = snapshot_file + '.gz'
+        
+        # 后台线程使用独立连接，备份期间其他连接的写入会使备份从头开始，保证快照一致
+        step_times = []
+        last = [time.perf_counter()]
+        
+        def progress(status, remaining, total):
+            now = time.perf_counter()
+            step_times.append(now - last[0])
+            if remaining:
+                time.sleep(step_pause)
+            last[0] = time.perf_counter()
+        
+        source = sqlite3.connect(self.db_name)
+        target = sqlite3.connect(snapshot_file)
+        start = time.perf_counter()
+        try:
+            source.backup(target, pages=pages, progress=progress)
+        finally:
+            target.close()
+            source.close()
+        copy_seconds = time.perf_counter() - start
+        
+        size = os.path.getsize(snapshot_file)
+        with open(snapshot_file, 'rb') as src, gzip.open(archive_file, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(snapshot_file)
+        total_seconds = time.perf_counter() - start
+        
+        removed = self._rotate_backups(backup_dir, base, keep)
+        return {
+            'backup_file': archive_file,
+            'size_bytes': size,
+            'compressed_bytes': os.path.getsize(archive_file),
+            'steps': len(step_times),
+            'copy_seconds': copy_seconds,
+            'total_seconds': total_seconds,
+            'throughput_mb_s': size / 1024 / 1024 / copy_seconds if copy_seconds else float('inf'),
+            'writer_blocked_max_ms': max(step_times, default=0) * 1000,
+            'writer_blocked_total_ms': sum(step_times) * 1000,
+            'removed_backups': removed,
+        }
+    
+    def start_backup(self, callback=None, **kwargs):
+        """在后台线程中执行 backup_database，完成后以 (结果, 异常) 调用 callback
+        
+        结果同时保存在 last_backup_report / last_backup_error 中，界面线程可轮询线程状态后读取。
+        """
+        def run():
+            report, error = None, None
+            try:
+                report = self.backup_database(**kwargs)
+            except Exception as e:
+                error = e
+            self.last_backup_report, self.last_backup_error = report, error
+            if callback is not None:
+                callback(report, error)
+        
+        self.last_backup_report = self.last_backup_error = None
+        thread = threading.Thread(target=run, name='debate-team-backup', daemon=True)
+        thread.start()
+        return thread
+    
+    def _rotate_backups(self, backup_dir, base, keep):
+        """只保留最新的 keep 个快照，返回被删除的文件"""
+        backups = self.list_backups(backup_dir, base)
+        removed = backups[keep:] if keep else []
+        for path in removed:
+            os.remove(path)
+        return removed
+    
+    def list_backups(self, backup_dir=None, base=None):
+        """列出备份快照，最新的在前"""
+        if backup_dir is None:
+            backup_dir = os.path.join(os.path.dirname(os.path.abspath(self.db_name)), 'backups')
+        if base is None:
+            base = os.path.splitext(os.path.basename(self.db_name))[0]
+        if not os.path.isdir(backup_dir):
+            return []
+        pattern = re.compile(rf'^{re.escape(base)}_\d{{8}}_\d{{6}}_\d{{6}}\.db\.gz$')
+        names = sorted((name for name in os.listdir(backup_dir) if pattern.match(name)), reverse=True)
+        return [os.path.join(backup_dir, name) for name in names]
+    
+    def restore_backup(self, backup_file):
+        """从压缩快照恢复：解压到临时文件后一次性 backup 到当前连接"""
+        snapshot_file = backup_file[:-3] + '.restore' if backup_file.endswith('.gz') else backup_file
+        if backup_file.endswith('.gz'):
+            with gzip.open(backup_file, 'rb') as src, open(snapshot_file, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+        
+        start = time.perf_counter()
+        self.detach_season_archives()
+        self.conn.commit()
+        source = sqlite3.connect(snapshot_file)
+        try:
+            source.backup(self.conn)
+        finally:
+            source.close()
+            if snapshot_file != backup_file:
+                os.remove(snapshot_file)
+        
+        # 快照可能来自旧版本，重新检查结构并清空编码缓存
+        self._label_codes.clear()
+        self._invalidate_caches()
+        self.initialize_database()
+        return time.perf_counter() - start
+    
+    def _set_change_capture(self, enabled):
+        """开启/暂停触发器写变更日志（在调用方的事务中生效）"""
+        self.conn.execute("UPDATE sync_meta SET value = ? WHERE key = 'capture'", ('1' if enabled else '0',))
+    
+    def changes_since(self, seq):
+        """获取序号大于 seq 的变更日志；其中一部分已被裁剪时返回全量快照"""
+        pruned = self.conn.execute("SELECT value FROM sync_meta WHERE key = 'log_pruned_seq'").fetchone()
+        if seq < int(pruned[0]):
+            return self._snapshot_changes()
+        query = '''
+            SELECT seq, table_name, row_uid, op, changed_at, origin, row_data
+            FROM change_log
+            WHERE seq > ?
+            ORDER BY seq
+        '''
+        return self.conn.execute(query, (seq,)).fetchall()
+    
+    def _log_head(self):
+        """变更日志已分配的最大序号（日志裁剪后仍然有效）"""
+        row = self.conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'").fetchone()
+        return row[0] if row else 0
+    
+    def _snapshot_changes(self):
+        """以当前全部数据和删除墓碑构造变更，供日志已被裁剪时的对端使用
+        
+        每行带上 row_versions 中的时间戳（没有记录的行为 0），对端按同样的规则取较新者，可安全重放。
+        """
+        head = self._log_head()
+        changes = []
+        for name, (table, payload) in self.SYNC_TABLES.items():
+            rows = self.conn.execute(f'''
+                SELECT t.uid, COALESCE(v.changed_at, 0), COALESCE(v.origin, 'init'), {payload.format(row='t')}
+                FROM {table} t
+                LEFT JOIN row_versions v ON v.table_name = ? AND v.row_uid = t.uid
+                ORDER BY t.id
+            ''', (name,)).fetchall()
+            changes += [(head, name, uid, 'U', changed_at, origin, data) for uid, changed_at, origin, data in rows]
+        tombstones = self.conn.execute('''
+            SELECT table_name, row_uid, changed_at, origin FROM row_versions WHERE op = 'D'
+        ''').fetchall()
+        changes += [(head, name, uid, 'D', changed_at, origin, None) for name, uid, changed_at, origin in tombstones]
+        return changes
+    
+    def prune_change_log(self):
+        """删除所有已知对端都已收到的变更日志，返回删除条数
+        
+        没有对端时日志全部删除；以后首次同步的副本会收到全量快照。
+        """
+        acknowledged = self.conn.execute('SELECT MIN(last_sent_seq) FROM sync_state').fetchone()[0]
+        through = self._log_head() if acknowledged is None else acknowledged
+        pruned = int(self.conn.execute("SELECT value FROM sync_meta WHERE key = 'log_pruned_seq'").fetchone()[0])
+        if through <= pruned:
+            return 0
+        deleted = self.cursor.execute('DELETE FROM change_log WHERE seq <= ?', (through,)).rowcount
+        self.conn.execute("UPDATE sync_meta SET value = ? WHERE key = 'log_pruned_seq'", (str(through),))
+        self.conn.commit()
+        return deleted
+    
+    def apply_changes(self, changes):
+        """在单个事务中应用其他副本的变更，按 (时间戳, 来源) 较新者为准
+        
+        返回 (已应用, 已跳过) 条数；重复收到的变更和本地已归档的行会被跳过，因此可以安全重放。
+        """
+        applied = skipped = 0
+        self.conn.execute('BEGIN')
+        try:
+            self._set_change_capture(False)
+            for _, table_name, row_uid, op, changed_at, origin, row_data in changes:
+                latest = self.conn.execute('''
+                    SELECT changed_at, origin, op FROM row_versions
+                    WHERE table_name = ? AND row_uid = ?
+                ''', (table_name, row_uid)).fetchone()
+                if latest is not None and (latest[2] == 'A' or (changed_at, origin) <= tuple(latest[:2])):
+                    skipped += 1
+                    continue
+                # 已归档比赛的出战记录（对端新录入的也一样）不写入主库
+                if op != 'D' and table_name == 'match_participation' and self.conn.execute('''
+                    SELECT 1 FROM row_versions WHERE table_name = 'matches' AND row_uid = ? AND op = 'A'
+                ''', (json.loads(row_data)['match_uid'],)).fetchone():
+                    skipped += 1
+                    continue
+                
+                table = self.SYNC_TABLES[table_name][0]
+                if op == 'D':
+                    self.cursor.execute(f'DELETE FROM {table} WHERE uid = ?', (row_uid,))
+                else:
+                    row = self._decode_change_row(table_name, json.loads(row_data))
+                    columns = ', '.join(row)
+                    updates = ', '.join(f'{column} = excluded.{column}' for column in row)
+                    self.cursor.execute(f'''
+                        INSERT INTO {table} (uid, {columns}) VALUES (?{', ?' * len(row)})
+                        ON CONFLICT(uid) DO UPDATE SET {updates}
+                    ''', (row_uid, *row.values()))
+                    if table_name == 'matches':
+                        # 与 add_match 相同：登记规范化对手并写入 opponent_id，按对手筛选无需等待汇总重建
+                        self.cursor.execute('UPDATE matches_data SET opponent_id = ? WHERE uid = ?',
+                                            (self._opponent_id(row['opponent']), row_uid))
+                
+                self.cursor.execute('''
+                    INSERT INTO change_log (table_name, row_uid, op, changed_at, origin, row_data)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (table_name, row_uid, op, changed_at, origin, row_data))
+                applied += 1
+            if applied:
+                # 对手汇总在下次查询时重建，保持同步只与变更量相关
+                self.conn.execute("UPDATE sync_meta SET value = '1' WHERE key = 'opponent_index_stale'")
+                self.conn.execute("UPDATE sync_meta SET value = '1' WHERE key = 'score_stats_stale'")
+            self._set_change_capture(True)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            self._label_codes.clear()
+            raise
+        if applied:
+            self._invalidate_caches()
+        return applied, skipped
+    
+    def _decode_change_row(self, table_name, data):
+        """变更内容转为本地数据表的列值（枚举文本转编码，uid 转本地 id）"""
+        def local_id(table, uid):
+            if uid is None:
+                return None
+            row = self.conn.execute(f'SELECT id FROM {table} WHERE uid = ?', (uid,)).fetchone()
+            return row[0] if row else None
+        
+        if table_name == 'members':
+            return {
+                'name': data['name'],
+                'position_code': self._encode_label('role_codes', data['position']),
+                'join_day': data['join_day'],
+                'experience_code': self._encode_label('experience_codes', data['experience_level']),
+            }
+        if table_name == 'matches':
+            return {column: data[column] for column in
+                    ('match_day', 'opponent', 'tournament', 'result_code', 'score_for', 'score_against', 'score_text')}
+        if table_name == 'match_participation':
+            return {
+                'member_id': local_id('members_data', data['member_uid']),
+                'match_id': local_id('matches_data', data['match_uid']),
+                'role_code': self._encode_label('role_codes', data['role']),
+                'performance_score': data['performance_score'],
+            }
+        return {
+            'day': data['day'],
+            'time_slot': data['time_slot'],
+            'activity': data['activity'],
+            'assigned_member_id': local_id('members_data', data['member_uid']),
+        }
+    
+    def _push_changes(self, target):
+        """把对端尚未收到的本地变更发送给 target"""
+        row = self.conn.execute('SELECT last_sent_seq FROM sync_state WHERE peer_id = ?',
+                                (target.node_id,)).fetchone()
+        last_sent = row[0] if row else 0
+        head = self._log_head()
+        changes = self.changes_since(last_sent)
+        applied, skipped = target.apply_changes(changes)
+        # 没有变更时也记录对端，裁剪日志时以所有对端中最小的已发送序号为准
+        self.cursor.execute('''
+            INSERT OR REPLACE INTO sync_state (peer_id, last_sent_seq, last_sync_at)
+            VALUES (?, ?, ?)
+        ''', (target.node_id, changes[-1][0] if changes else max(last_sent, head),
+              datetime.now().isoformat(timespec='seconds')))
+        self.conn.commit()
+        return len(changes), applied, skipped
+    
+    def sync_with(self, other_db_name):
+        """与另一个数据库文件双向增量同步，只交换上次同步之后的变更
+        
+        冲突按变更时间戳处理，较新的修改生效。新副本应从现有数据库文件复制后再开始同步。
+        """
+        if os.path.abspath(other_db_name) == os.path.abspath(self.db_name):
+            raise ValueError("不能与自身同步")
+        
+        start = time.perf_counter()
+        other = DebateTeamManagementSystem(other_db_name)
+        try:
+            # 直接复制得到的副本与本库节点编号相同，为其重新生成
+            if other.node_id == self.node_id:
+                other.node_id = uuid.uuid4().hex
+                other.conn.execute("UPDATE sync_meta SET value = ? WHERE key = 'node_id'", (other.node_id,))
+                other.conn.commit()
+            sent, sent_applied, sent_skipped = self._push_changes(other)
+            received, received_applied, received_skipped = other._push_changes(self)
+            self.prune_change_log()
+            other.prune_change_log()
+        finally:
+            other.close_connection()
+        return {
+            'sent': sent,
+            'sent_applied': sent_applied,
+            'received': received,
+            'received_applied': received_applied,
+            'skipped': sent_skipped + received_skipped,
+            'seconds': time.perf_counter() - start,
+        }
+    
+    def generate_performance_report(self, include_archived=False, **filters):
+        """生成能力评估报告，filters 同 get_member_stats 的筛选参数"""
+        stats_df = self.get_member_stats(include_archived, **filters)
+        distribution = self.get_score_distribution(include_archived, **filters)
+        stats_df = stats_df.merge(distribution, left_on='id', right_on='member_id', how='left').drop(columns='member_id')
+        
+        # 保存数据到CSV供R分析
+        stats_df.to_csv('performance_data.csv', index=False)
+        
+        # 运行R脚本进行高级分析
+        r_script = '''
+        # R_analysis.R
+        library(ggplot2)
+        library(dplyr)
+        
+        # 读取数据
+        data <- read.csv("performance_data.csv")
+        
+        # 清理数据
+        data <- data[!is.na(data$avg_performance), ]
+        
+        # 绘制性能图
+        p1 <- ggplot(data, aes(x=reorder(name, avg_performance), y=avg_performance)) +
+          geom_bar(stat="identity", fill="steelblue") +
+          coord_flip() +
+          labs(title="队员平均表现评分", x="队员姓名", y="平均表现评分") +
+          theme_minimal()
+        
+        # 绘制胜率图
+        p2 <- ggplot(data, aes(x=reorder(name, matches_played), y=matches_played)) +
+          geom_bar(stat="identity", fill="orange") +
+          coord_flip() +
+          labs(title="队员参赛次数", x="队员姓名", y="参赛次数") +
+          theme_minimal()
+        
+        # 保存图表
+        ggsave("performance_chart.png", plot=p1, width=10, height=6)
+        ggsave("participation_chart.png", plot=p2, width=10, height=6)
+        
+        # 输出摘要
+        if(nrow(data) > 0) {
+            cat("=== 队员能力评估摘要 ===\n")
+            cat("平均表现最高:", data$name[which.max(data$avg_performance)], "\n")
+            cat("参赛最多:", data$name[which.max(data$matches_played)], "\n")
+            cat("胜场最多:", data$name[which.max(data$wins)], "\n")
+        }
+        '''
+        
+        # 将R脚本写入文件
+        with open('R_analysis.R', 'w') as f:
+            f.write(r_script)
+        
+        # 尝试运行R脚本
+        try:
+            result = subprocess.run(['Rscript', 'R_analysis.R'], 
+                                  capture_output=True, text=True)
+            if result.returncode == 0:
+                print("R分析完成，图表已生成")
+            else:
+                print("R脚本执行失败，错误:", result.stderr)
+        except FileNotFoundError:
+            print("R未安装或未添加到PATH中，跳过R分析")
+        
+        return stats_df
+    
+    def export_data(self, format_type='csv'):
+        """导出数据"""
+        tables = ['members', 'matches', 'match_participation', 'schedule']
+        for table in tables:
+            df = pd.read_sql_query(f'SELECT * FROM {table}', self.conn)
+            if format_type.lower() == 'csv':
+                df.to_csv(f'{table}_export.csv', index=False)
+            elif format_type.lower() == 'excel':
+                df.to_excel(f'{table}_export.xlsx', index=False)
+        messagebox.showinfo("导出成功", f"数据已导出为{format_type.upper()}格式")
+    
+    def export_report(self, df, path, title=None):
+        """将完整报表写入独立的 HTML 或 CSV 文件（按扩展名判断），不经过界面控件"""
+        if path.lower().endswith(('.html', '.htm')):
+            title = html.escape(title or '报表')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n')
+                f.write(f"<title>{title}</title>\n</head>\n<body>\n<h1>{title}</h1>\n")
+                f.write(df.to_html(index=False, na_rep='', float_format=lambda x: f"{x:.3f}"))
+                f.write('\n</body>\n</html>\n')
+        else:
+            df.to_csv(path, index=False)
+        return path
+    
+    def close_connection(self):
+        """关闭数据库连接"""
+        self.conn.close()
+
+class StatsCube:
+    """队员 × 角色 × 锦标赛 × 月份的多维统计立方体
+    
+    每个单元格保存出战次数、有评分的次数、评分和、评分平方和、胜场数，均为稠密 NumPy 数组，
+    任意切片和汇总只需在数组上求和。内存占用为各维度取值数之积。
+    """
+    DIMENSIONS = ('member', 'role', 'tournament', 'month')
+    MEASURES = ('count', 'scored', 'score_sum', 'score_sq', 'wins')
+    
+    def __init__(self):
+        self.keys = {dim: [] for dim in self.DIMENSIONS}
+        self.index = {dim: {} for dim in self.DIMENSIONS}
+        shape = (0,) * len(self.DIMENSIONS)
+        self.arrays = {measure: np.zeros(shape, dtype=np.int64 if measure in ('count', 'scored', 'wins') else np.float64)
+                       for measure in self.MEASURES}
+    
+    # 每行出战记录对应的维度取值和度量（比赛表别名 ma，出战表别名 mp）
+    ROW_SQL = '''
+        SELECT
+            mp.member_id,
+            r.label,
+            ma.tournament,
+            COALESCE(strftime('%Y-%m', ma.match_day * 86400, 'unixepoch'), ''),
+            mp.performance_score,
+            ma.result_code = 1
+        FROM {participation} mp
+        JOIN {matches} ma ON mp.match_id = ma.id
+        LEFT JOIN role_codes r ON mp.role_code = r.code
+    '''
+    
+    @classmethod
+    def build(cls, conn):
+        """从出战记录和比赛表一次性构建立方体"""
+        return cls.from_rows(conn.execute(
+            cls.ROW_SQL.format(participation='match_participation_data', matches='matches_data')
+        ).fetchall())
+    
+    @classmethod
+    def from_rows(cls, rows):
+        """由 ROW_SQL 查询得到的行构建立方体"""
+        cube = cls()
+        if not rows:
+            return cube
+        
+        columns = list(zip(*rows))
+        codes = [np.fromiter((cube._key_index(dim, key) for key in columns[axis]), dtype=np.int64, count=len(rows))
+                 for axis, dim in enumerate(cls.DIMENSIONS)]
+        cube._grow()
+        shape = cube.arrays['count'].shape
+        flat = np.ravel_multi_index(codes, shape)
+        size = int(np.prod(shape))
+        
+        scores = np.array([np.nan if score is None else score for score in columns[4]], dtype=np.float64)
+        scored = ~np.isnan(scores)
+        scores = np.where(scored, scores, 0.0)
+        wins = np.array([bool(win) for win in columns[5]], dtype=np.int64)
+        
+        cube.arrays['count'] += np.bincount(flat, minlength=size).reshape(shape)
+        cube.arrays['scored'] += np.bincount(flat, weights=scored, minlength=size).astype(np.int64).reshape(shape)
+        cube.arrays['score_sum'] += np.bincount(flat, weights=scores, minlength=size).reshape(shape)
+        cube.arrays['score_sq'] += np.bincount(flat, weights=scores * scores, minlength=size).reshape(shape)
+        cube.arrays['wins'] += np.bincount(flat, weights=wins, minlength=size).astype(np.int64).reshape(shape)
+        return cube
+    
+    def _key_index(self, dim, key):
+        """取得维度取值的下标，新取值追加到末尾"""
+        index = self.index[dim]
+        position = index.get(key)
+        if position is None:
+            position = index[key] = len(self.keys[dim])
+            self.keys[dim].append(key)
+        return position
+    
+    def _grow(self):
+        """新取值出现后扩展数组，已有数据保持不变"""
+        shape = tuple(len(self.keys[dim]) for dim in self.DIMENSIONS)
+        current = self.arrays['count'].shape
+        if shape == current:
+            return
+        padding = [(0, new - old) for new, old in zip(shape, current)]
+        for measure, array in self.arrays.items():
+            self.arrays[measure] = np.pad(array, padding)
+    
+    def add(self, member_id, role, tournament, month, performance_score, win):
+        """增量加入一条出战记录"""
+        cell = tuple(self._key_index(dim, key)
+                     for dim, key in zip(self.DIMENSIONS, (member_id, role, tournament, month)))
+        self._grow()
+        self.arrays['count'][cell] += 1
+        self.arrays['wins'][cell] += int(bool(win))
+        if performance_score is not None:
+            self.arrays['scored'][cell] += 1
+            self.arrays['score_sum'][cell] += performance_score
+            self.arrays['score_sq'][cell] += performance_score * performance_score
+    
+    def _selectors(self, filters):
+        """把 {维度: 取值或取值列表} 转为每个维度上的下标数组"""
+        selectors = []
+        for dim in self.DIMENSIONS:
+            value = filters.get(dim)
+            if value is None:
+                selectors.append(np.arange(len(self.keys[dim])))
+                continue
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            selectors.append(np.array([self.index[dim][v] for v in values if v in self.index[dim]], dtype=np.int64))
+        return selectors
+    
+    def slice(self, member=None, role=None, tournament=None, month=None):
+        """汇总任意切片，返回出战次数、平均分、标准差、胜场和胜率"""
+        selectors = self._selectors({'member': member, 'role': role, 'tournament': tournament, 'month': month})
+        grid = np.ix_(*selectors)
+        totals = {measure: array[grid].sum() for measure, array in self.arrays.items()}
+        return self._summarize(totals)
+    
+    def rollup(self, by=('member',), **filters):
+        """按 by 中的维度分组（下钻），其余维度求和（上卷），返回 DataFrame
+        
+        filters 以维度名为键，值为单个取值或取值列表，例如 rollup(('member', 'role'), tournament='全国赛')。
+        """
+        unknown = set(by) | set(filters)
+        unknown -= set(self.DIMENSIONS)
+        if unknown:
+            raise ValueError(f"未知维度: {', '.join(sorted(unknown))}")
+        
+        selectors = self._selectors(filters)
+        grid = np.ix_(*selectors)
+        keep = [axis for axis, dim in enumerate(self.DIMENSIONS) if dim in by]
+        drop = tuple(axis for axis in range(len(self.DIMENSIONS)) if axis not in keep)
+        totals = {measure: array[grid].sum(axis=drop) for measure, array in self.arrays.items()}
+        
+        # 按 by 的顺序排列维度
+        order = [keep.index(self.DIMENSIONS.index(dim)) for dim in by]
+        totals = {measure: np.transpose(array, order) for measure, array in totals.items()}
+        
+        labels = [[self.keys[dim][i] for i in selectors[self.DIMENSIONS.index(dim)]] for dim in by]
+        flat = {measure: array.ravel() for measure, array in totals.items()}
+        mask = flat['count'] > 0
+        df = pd.DataFrame(self._summarize(flat))
+        index = pd.MultiIndex.from_product(labels, names=list(by)) if by else pd.RangeIndex(1)
+        df.index = index
+        return df[mask].reset_index(drop=not by)
+    
+    def _summarize(self, totals):
+        """由计数、和、平方和计算均值、标准差和胜率"""
+        count = np.asarray(totals['count'], dtype=np.float64)
+        scored = np.asarray(totals['scored'], dtype=np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = totals['score_sum'] / scored
+            variance = np.maximum(totals['score_sq'] / scored - mean * mean, 0.0)
+            win_rate = totals['wins'] / count
+        return {
+            'count': totals['count'],
+            'avg_performance': mean,
+            'std_performance': np.sqrt(variance),
+            'wins': totals['wins'],
+            'win_rate': win_rate,
+        }
+
+class LineupRecommender:
+    """出战阵容推荐：按历史表现估计每名队员在各辩位的期望得分，用匈牙利算法求最优分配
+    
+    近期比赛权重更高（按 half_life_days 指数衰减）；某辩位上记录较少的队员向其整体水平收缩，
+    整体水平再向全队平均收缩，避免只打过一场的队员被高估。
+    """
+    LINEUP_ROLES = ['一辩', '二辩', '三辩', '四辩']
+    
+    def __init__(self, member_ids, names, expected):
+        self.member_ids = list(member_ids)
+        self.names = list(names)
+        # expected[i, j]: 队员 i 担任 LINEUP_ROLES[j] 的期望得分
+        self.expected = expected
+    
+    @classmethod
+    def from_history(cls, conn, member_ids=None, today=None, half_life_days=180, prior_weight=2.0):
+        """由出战记录构建队员 × 辩位期望得分矩阵"""
+        members = conn.execute('SELECT id, name FROM members_data ORDER BY id').fetchall()
+        if member_ids is not None:
+            allowed = set(member_ids)
+            members = [member for member in members if member[0] in allowed]
+        ids = [member[0] for member in members]
+        names = [member[1] for member in members]
+        n_roles = len(cls.LINEUP_ROLES)
+        
+        rows = conn.execute('''
+            SELECT mp.member_id, r.label, ma.match_day, mp.performance_score
+            FROM match_participation_data mp
+            JOIN matches_data ma ON mp.match_id = ma.id
+            JOIN role_codes r ON mp.role_code = r.code
+            WHERE mp.performance_score IS NOT NULL
+        ''').fetchall()
+        
+        member_index = {member_id: i for i, member_id in enumerate(ids)}
+        role_index = {role: j for j, role in enumerate(cls.LINEUP_ROLES)}
+        rows = [row for row in rows if row[0] in member_index]
+        weight = np.zeros((len(ids), n_roles))
+        weighted_sum = np.zeros((len(ids), n_roles))
+        member_weight = np.zeros(len(ids))
+        member_sum = np.zeros(len(ids))
+        
+        if rows:
+            member_col = np.array([member_index[row[0]] for row in rows], dtype=np.int64)
+            days = np.array([np.nan if row[2] is None else row[2] for row in rows], dtype=np.float64)
+            # 迁移时日期无法识别的比赛视为最早的比赛
+            undated = np.isnan(days)
+            days[undated] = days[~undated].min() if (~undated).any() else 0.0
+            scores = np.array([row[3] for row in rows], dtype=np.float64)
+            if today is None:
+                today = days.max()
+            w = 0.5 ** (np.maximum(today - days, 0) / half_life_days)
+            
+            # 自由辩等其他角色也计入队员整体水平
+            np.add.at(member_weight, member_col, w)
+            np.add.at(member_sum, member_col, w * scores)
+            in_lineup = np.array([row[1] in role_index for row in rows])
+            role_col = np.array([role_index.get(row[1], 0) for row in rows], dtype=np.int64)
+            np.add.at(weight, (member_col[in_lineup], role_col[in_lineup]), w[in_lineup])
+            np.add.at(weighted_sum, (member_col[in_lineup], role_col[in_lineup]), (w * scores)[in_lineup])
+            team_mean = float((w * scores).sum() / w.sum())
+        else:
+            team_mean = 0.0
+        
+        member_mean = (member_sum + prior_weight * team_mean) / (member_weight + prior_weight)
+        expected = (weighted_sum + prior_weight * member_mean[:, None]) / (weight + prior_weight)
+        return cls(ids, names, expected)
+    
+    @staticmethod
+    def solve_assignment(cost):
+        """匈牙利算法（带势能的最短增广路）求最小代价分配
+        
+        cost 形状为 (行数, 列数) 且行数 <= 列数，返回每行分配到的列下标。复杂度 O(行数² × 列数)。
+        """
+        n, m = cost.shape
+        u = np.zeros(n + 1)
+        v = np.zeros(m + 1)
+        match_col = np.zeros(m + 1, dtype=np.int64)   # 列 j 匹配到的行（1 起，0 表示未匹配）
+        way = np.zeros(m + 1, dtype=np.int64)
+        for i in range(1, n + 1):
+            match_col[0] = i
+            j0 = 0
+            min_v = np.full(m + 1, np.inf)
+            used = np.zeros(m + 1, dtype=bool)
+            while True:
+                used[j0] = True
+                i0 = match_col[j0]
+                free = ~used[1:]
+                reduced = cost[i0 - 1] - u[i0] - v[1:]
+                better = free & (reduced < min_v[1:])
+                min_v[1:][better] = reduced[better]
+                way[1:][better] = j0
+                candidates = np.where(free, min_v[1:], np.inf)
+                j1 = int(np.argmin(candidates)) + 1
+                delta = candidates[j1 - 1]
+                used_cols = np.flatnonzero(used)
+                u[match_col[used_cols]] += delta
+                v[used_cols] -= delta
+                min_v[1:][free] -= delta
+                j0 = j1
+                if match_col[j0] == 0:
+                    break
+            while j0:
+                j1 = way[j0]
+                match_col[j0] = match_col[j1]
+                j0 = j1
+        
+        assignment = np.empty(n, dtype=np.int64)
+        for j in range(1, m + 1):
+            if match_col[j]:
+                assignment[match_col[j] - 1] = j - 1
+        return assignment
+    
+    def top_lineups(self, k=3):
+        """用 Murty 算法按总期望得分从高到低枚举前 k 个阵容"""
+        n_roles = len(self.LINEUP_ROLES)
+        if len(self.member_ids) < n_roles:
+            raise ValueError(f"可用队员不足 {n_roles} 人")
+        
+        # 辩位为行、队员为列，最大化得分即最小化负得分
+        base_cost = -self.expected.T
+        forbidden = np.abs(base_cost).max() * (n_roles + 1) + 1.0
+        
+        def solve(included, excluded):
+            cost = base_cost.copy()
+            for row, col in included:
+                keep = cost[row, col]
+                cost[row, :] = forbidden
+                cost[:, col] = forbidden
+                cost[row, col] = keep
+            for row, col in excluded:
+                cost[row, col] = forbidden
+            assignment = self.solve_assignment(cost)
+            if (cost[np.arange(n_roles), assignment] >= forbidden).any():
+                return None
+            return -base_cost[np.arange(n_roles), assignment].sum(), assignment
+        
+        results = []
+        first = solve([], [])
+        heap = [(-first[0], 0, first[1], [], [])]
+        counter = 1
+        while heap and len(results) < k:
+            negative_total, _, assignment, included, excluded = heapq.heappop(heap)
+            results.append((-negative_total, assignment))
+            fixed_rows = {row for row, _ in included}
+            prefix = list(included)
+            for row in range(n_roles):
+                if row in fixed_rows:
+                    continue
+                child_excluded = excluded + [(row, assignment[row])]
+                child = solve(prefix, child_excluded)
+                if child is not None:
+                    heapq.heappush(heap, (-child[0], counter, child[1], list(prefix), child_excluded))
+                    counter += 1
+                prefix.append((row, assignment[row]))
+        
+        lineups = []
+        for total, assignment in results:
+            lineups.append({
+                'total': float(total),
+                'lineup': [(role, self.member_ids[col], self.names[col], float(self.expected[col, row]))
+                           for row, (role, col) in enumerate(zip(self.LINEUP_ROLES, assignment))],
+            })
+        return lineups
+
+class TournamentSimulator:
+    """锦标赛蒙特卡洛模拟器
+    
+    用历史比赛拟合 Bradley-Terry 型逻辑模型：我方胜率 = sigmoid(基准 + 出战队员平均实力 - 对手实力)，
+    平局计半场胜利，带 L2 正则，从未交手的对手实力视为 0。对手按规范化名称识别，与对手情报一致。
+    对淘汰赛对阵表做向量化模拟，按固定分片数和 SeedSequence 分发到进程池，结果可复现。
+    """
+    OUR_TEAM = '我方'
+    
+    def __init__(self, base, member_strength, opponent_strength):
+        self.base = base
+        self.member_strength = member_strength
+        self.opponent_strength = opponent_strength
+    
+    @classmethod
+    def fit(cls, matches, appearances, l2=1.0, iterations=25):
+        """用牛顿法（IRLS）拟合基准、队员和对手实力
+        
+        matches 为有结果的比赛 (id, 对手, 结果编码)，appearances 为出战 (比赛 id, 队员 id)。
+        """
+        normalize = DebateTeamManagementSystem.normalize_opponent
+        matches = [(match_id, normalize(opponent), result_code) for match_id, opponent, result_code in matches]
+        if not matches:
+            return cls(0.0, {}, {})
+        
+        lineups = {}
+        for match_id, member_id in appearances:
+            lineups.setdefault(match_id, set()).add(member_id)
+        
+        member_ids = sorted({member for lineup in lineups.values() for member in lineup})
+        opponents = sorted({opponent for _, opponent, _ in matches})
+        member_index = {member_id: i for i, member_id in enumerate(member_ids)}
+        opponent_index = {opponent: i for i, opponent in enumerate(opponents)}
+        
+        # 设计矩阵：[基准, 出战队员平均指示, -对手指示]
+        n_members, n_opponents = len(member_ids), len(opponents)
+        X = np.zeros((len(matches), 1 + n_members + n_opponents))
+        X[:, 0] = 1.0
+        y = np.empty(len(matches))
+        for row, (match_id, opponent, result_code) in enumerate(matches):
+            lineup = lineups.get(match_id, ())
+            for member_id in lineup:
+                X[row, 1 + member_index[member_id]] = 1.0 / len(lineup)
+            X[row, 1 + n_members + opponent_index[opponent]] = -1.0
+            y[row] = {1: 1.0, 2: 0.0, 3: 0.5}[result_code]
+        
+        penalty = np.full(X.shape[1], l2)
+        penalty[0] = 1e-6
+        beta = np.zeros(X.shape[1])
+        for _ in range(iterations):
+            p = 1.0 / (1.0 + np.exp(-(X @ beta)))
+            gradient = X.T @ (y - p) - penalty * beta
+            hessian = (X * (p * (1 - p))[:, None]).T @ X + np.diag(penalty)
+            step = np.linalg.solve(hessian, gradient)
+            beta += step
+            if np.abs(step).max() < 1e-8:
+                break
+        
+        return cls(
+            float(beta[0]),
+            {member_id: float(beta[1 + i]) for i, member_id in enumerate(member_ids)},
+            {opponent: float(beta[1 + n_members + i]) for i, opponent in enumerate(opponents)},
+        )
     
-    def generate_performance_report(self):
-        """生成能力评估报告"""
-        stats_df = self.get_member_stats()
+    def team_strength(self, lineup_member_ids=None):
+        """我方实力：基准加出战队员平均实力（未指定阵容时取基准）"""
+        if not lineup_member_ids:
+            return self.base
+        return self.base + float(np.mean([self.member_strength.get(m, 0.0) for m in lineup_member_ids]))
+    
+    def opponent_strength_of(self, opponent):
+        """对手实力，名称按规范化匹配（忽略全半角、大小写和空白）"""
+        return self.opponent_strength.get(DebateTeamManagementSystem.normalize_opponent(opponent), 0.0)
+    
+    def win_probability(self, opponent, lineup_member_ids=None):
+        """我方对某对手的单场胜率"""
+        diff = self.team_strength(lineup_member_ids) - self.opponent_strength_of(opponent)
+        return 1.0 / (1.0 + np.exp(-diff))
+    
+    @staticmethod
+    def _simulate_shard(strengths, trials, seed):
+        """模拟一个分片：返回每支队伍赢下每一轮的次数（形状 (队伍数, 轮数)）及分片开始、结束时间
         
-        # 保存数据到CSV供R分析
-        stats_df.to_csv('performance_data.csv', index=False)
+        时间取 time.time()，各工作进程之间可以比较。
+        """
+        started = time.time()
+        rng = np.random.default_rng(seed)
+        n_teams = len(strengths)
+        n_rounds = n_teams.bit_length() - 1
+        counts = np.zeros((n_teams, n_rounds), dtype=np.int64)
+        alive = np.broadcast_to(np.arange(n_teams, dtype=np.int32), (trials, n_teams))
+        for round_index in range(n_rounds):
+            a, b = alive[:, 0::2], alive[:, 1::2]
+            p = 1.0 / (1.0 + np.exp(strengths[b] - strengths[a]))
+            alive = np.where(rng.random(p.shape) < p, a, b)
+            counts[:, round_index] = np.bincount(alive.ravel(), minlength=n_teams)
+        return counts, started, time.time()
+    
+    def simulate(self, bracket, trials=200000, lineup_member_ids=None, seed=0, n_shards=8, processes=None):
+        """模拟单败淘汰赛对阵表 bracket（按对阵顺序排列，队伍数为 2 的幂，我方用 OUR_TEAM 表示）
         
-        # 运行R脚本进行高级分析
-        r_script = '''
-        # R_analysis.R
-        library(ggplot2)
-        library(dplyr)
+        返回各队赢下每一轮的概率（最后一列为夺冠概率）和每秒模拟次数。
+        seconds 和每秒次数只计分片模拟本身（从最早开始的分片到最晚结束的分片），
+        进程池启动到第一个分片开始之间的时间单独记在 startup_seconds 中。
+        processes=0 时在当前进程中运行。
+        """
+        n_teams = len(bracket)
+        if n_teams < 2 or n_teams & (n_teams - 1):
+            raise ValueError("对阵表队伍数必须是 2 的幂")
         
-        # 读取数据
-        data <- read.csv("performance_data.csv")
+        strengths = np.array([self.team_strength(lineup_member_ids) if team == self.OUR_TEAM
+                              else self.opponent_strength_of(team) for team in bracket])
+        shard_trials = [trials // n_shards + (1 if i < trials % n_shards else 0) for i in range(n_shards)]
+        seeds = np.random.SeedSequence(seed).spawn(n_shards)
         
-        # 清理数据
-        data <- data[!is.na(data$avg_performance), ]
+        start = time.time()
+        if processes == 0:
+            results = [self._simulate_shard(strengths, n, seed) for n, seed in zip(shard_trials, seeds)]
+        else:
+            with ProcessPoolExecutor(max_workers=processes or min(n_shards, os.cpu_count() or 1)) as pool:
+                results = list(pool.map(TournamentSimulator._simulate_shard,
+                                        [strengths] * n_shards, shard_trials, seeds))
         
-        # 绘制性能图
-        p1 <- ggplot(data, aes(x=reorder(name, avg_performance), y=avg_performance)) +
-          geom_bar(stat="identity", fill="steelblue") +
-          coord_flip() +
-          labs(title="队员平均表现评分", x="队员姓名", y="平均表现评分") +
-          theme_minimal()
+        shard_counts, started, finished = zip(*results)
+        startup = max(min(started) - start, 0.0)
+        elapsed = max(finished) - min(started)
+        counts = np.sum(shard_counts, axis=0)
+        n_rounds = counts.shape[1]
+        columns = [f'第{r + 1}轮胜' for r in range(n_rounds - 1)] + ['夺冠']
+        probabilities = pd.DataFrame(counts / trials, index=bracket, columns=columns)
+        probabilities.insert(0, '实力', strengths)
+        return {
+            'probabilities': probabilities,
+            'trials': trials,
+            'seconds': elapsed,
+            'startup_seconds': startup,
+            'trials_per_second': trials / elapsed if elapsed else float('inf'),
+        }
+
+class TeamFederation:
+    """多支队伍的联合统计：每个数据库文件在独立进程中计算可合并的计数与求和，再在主进程中合并
+    
+    合并只对计数和求和相加，平均分、胜率、标准差在合并后统一计算，避免"平均值的平均值"。
+    队员按 (队伍, 本库队员 ID) 区分，不同数据库的 ID 和 uid 互不相关，默认不跨文件合并；
+    同一人在多支队伍出战时，通过 member_mapping {(队伍, 队员 ID): 人员标识} 显式指定后合并为一行。
+    db_files 可以是 {队伍名: 文件} 字典；为文件列表时队伍名取能区分各文件的最短路径后缀，
+    例如 一队.db 为"一队"，sq1/debate_team.db 与 sq2/debate_team.db 为"sq1/debate_team"和"sq2/debate_team"。
+    各文件应是不同队伍的数据库，而不是彼此同步的副本，否则同一场比赛会被重复计入。
+    """
+    MEMBER_SUMS = ['matches_played', 'scored', 'score_sum', 'score_sq', 'wins']
+    MATCH_SUMS = ['matches', 'wins', 'losses', 'draws', 'scored_matches', 'points_for', 'points_against',
+                  'participants', 'scored', 'score_sum']
+    
+    def __init__(self, db_files, processes=None, member_mapping=None):
+        if not db_files:
+            raise ValueError("至少需要一个数据库文件")
+        if isinstance(db_files, dict):
+            self.squads, self.db_files = list(db_files), list(db_files.values())
+        else:
+            self.db_files = list(db_files)
+            self.squads = self.squad_names(self.db_files)
+        self.processes = processes
         
-        # 绘制胜率图
-        p2 <- ggplot(data, aes(x=reorder(name, matches_played), y=matches_played)) +
-          geom_bar(stat="identity", fill="orange") +
-          coord_flip() +
-          labs(title="队员参赛次数", x="队员姓名", y="参赛次数") +
-          theme_minimal()
+        paths = [os.path.realpath(db_file) for db_file in self.db_files]
+        repeated = sorted({db_file for db_file, path in zip(self.db_files, paths) if paths.count(path) > 1})
+        if repeated:
+            raise ValueError(f"同一数据库文件出现多次: {', '.join(repeated)}")
+        self.member_mapping = {(squad, int(member_id)): str(person)
+                               for (squad, member_id), person in (member_mapping or {}).items()}
+        unknown = sorted({squad for squad, _ in self.member_mapping if squad not in self.squads})
+        if unknown:
+            raise ValueError(f"队员对应表中的队伍不在文件列表中: {', '.join(unknown)}")
+    
+    @staticmethod
+    def squad_names(db_files):
+        """队伍名：能区分各文件的最短路径后缀（不含扩展名），文件名不重复时即为文件名"""
+        parts = [os.path.splitext(os.path.realpath(db_file))[0].replace(os.sep, '/').split('/')
+                 for db_file in db_files]
+        names = []
+        for index, own in enumerate(parts):
+            others = [other for position, other in enumerate(parts) if position != index]
+            depth = 1
+            while depth < len(own) and any(other[-depth:] == own[-depth:] for other in others):
+                depth += 1
+            names.append('/'.join(own[-depth:]))
+        return names
+    
+    @staticmethod
+    def load_member_mapping(csv_file):
+        """从 CSV（列 squad、member_id、person）读取队员对应表"""
+        df = pd.read_csv(csv_file, dtype={'squad': str, 'person': str})
+        missing = {'squad', 'member_id', 'person'} - set(df.columns)
+        if missing:
+            raise ValueError(f"队员对应表缺少列: {', '.join(sorted(missing))}")
+        return {(row.squad, int(row.member_id)): row.person for row in df.itertuples(index=False)}
+    
+    @staticmethod
+    def _collect_file(db_file, include_archived, filters):
+        """在工作进程中执行：以只读方式打开一个数据库并返回中间结果和耗时"""
+        start = time.perf_counter()
+        try:
+            system = DebateTeamManagementSystem(db_file, read_only=True)
+            try:
+                partials = system.get_stat_partials(include_archived, **filters)
+            finally:
+                system.close_connection()
+            return db_file, partials, time.perf_counter() - start, None
+        except Exception as e:
+            return db_file, None, time.perf_counter() - start, str(e)
+    
+    def collect(self, include_archived=False, **filters):
+        """并行收集并合并，返回队员排行、锦标赛汇总、对手汇总和每个文件的耗时
         
-        # 保存图表
-        ggsave("performance_chart.png", plot=p1, width=10, height=6)
-        ggsave("participation_chart.png", plot=p2, width=10, height=6)
+        filters 支持 start_date、end_date、tournament、opponent（队员 ID 只在单个数据库内有意义）。
+        队员排行中 person 为对应表中的人员标识（未指定时为空），member_id 为各队本库中的队员 ID。
+        processes=0 时在当前进程中依次计算。
+        """
+        start = time.perf_counter()
+        n_files = len(self.db_files)
+        if self.processes == 0:
+            results = [self._collect_file(db_file, include_archived, filters) for db_file in self.db_files]
+        else:
+            with ProcessPoolExecutor(max_workers=self.processes or min(n_files, os.cpu_count() or 1)) as pool:
+                results = list(pool.map(TeamFederation._collect_file, self.db_files,
+                                        [include_archived] * n_files, [filters] * n_files))
+        elapsed = time.perf_counter() - start
         
-        # 输出摘要
-        if(nrow(data) > 0) {
-            cat("=== 队员能力评估摘要 ===\n")
-            cat("平均表现最高:", data$name[which.max(data$avg_performance)], "\n")
-            cat("参赛最多:", data$name[which.max(data$matches_played)], "\n")
-            cat("胜场最多:", data$name[which.max(data$wins)], "\n")
+        members, matches, files = [], [], []
+        for squad, (db_file, partials, seconds, error) in zip(self.squads, results):
+            files.append({'squad': squad, 'file': db_file, 'seconds': seconds, 'error': error,
+                          'members': 0 if error else len(partials['members']),
+                          'matches': 0 if error else int(partials['matches']['matches'].sum())})
+            if error:
+                continue
+            member_df = partials['members'].rename(columns={'id': 'member_id'}).assign(squad=squad)
+            member_df['person'] = [self.member_mapping.get((squad, member_id))
+                                   for member_id in member_df['member_id']]
+            members.append(member_df)
+            matches.append(partials['matches'].assign(squad=squad))
+        
+        return {
+            'members': self._merge_members(members),
+            'tournaments': self._merge_matches(matches, 'tournament'),
+            'opponents': self._merge_matches(matches, 'opponent'),
+            'files': pd.DataFrame(files),
+            'seconds': elapsed,
         }
-        '''
+    
+    def _merge_members(self, frames):
+        """合并队员的计数与求和，再计算平均分、标准差和胜率
         
-        # 将R脚本写入文件
-        with open('R_analysis.R', 'w') as f:
-            f.write(r_script)
+        只有对应表中指向同一人员标识的队员跨队伍合并，其余按 (队伍, 队员 ID) 各占一行。
+        """
+        columns = ['person', 'name', 'squad', 'member_id', 'position', 'experience_level'] + self.MEMBER_SUMS
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        df = pd.concat(frames, ignore_index=True)
+        df['key'] = [('person', person) if pd.notna(person) else ('member', squad, member_id)
+                     for person, squad, member_id in zip(df['person'], df['squad'], df['member_id'])]
+        merged = df.groupby('key', sort=False).agg(
+            person=('person', 'first'),
+            name=('name', 'first'),
+            squad=('squad', lambda squads: '、'.join(squads)),
+            member_id=('member_id', lambda ids: '、'.join(map(str, ids))),
+            position=('position', 'first'),
+            experience_level=('experience_level', 'first'),
+            **{column: (column, 'sum') for column in self.MEMBER_SUMS}
+        ).reset_index(drop=True)
         
-        # 尝试运行R脚本
+        with np.errstate(invalid='ignore', divide='ignore'):
+            scored = merged['scored'].where(merged['scored'] > 0)
+            merged['avg_performance'] = merged['score_sum'] / scored
+            variance = (merged['score_sq'] / scored - merged['avg_performance'] ** 2).clip(lower=0)
+            merged['std_performance'] = np.sqrt(variance)
+            merged['win_rate'] = merged['wins'] / merged['matches_played'].where(merged['matches_played'] > 0)
+        return merged.sort_values(['avg_performance', 'matches_played'], ascending=False,
+                                  na_position='last').reset_index(drop=True)
+    
+    def _merge_matches(self, frames, by):
+        """按锦标赛或规范化后的对手合并比赛汇总"""
+        if not frames:
+            return pd.DataFrame(columns=[by] + self.MATCH_SUMS)
+        df = pd.concat(frames, ignore_index=True)
+        if by == 'opponent':
+            # 各队录入的对手写法可能不同，按规范化名称合并，显示最先出现的写法
+            df['key'] = df['opponent'].map(DebateTeamManagementSystem.normalize_opponent)
+        else:
+            df['key'] = df[by]
+        merged = df.groupby('key', sort=False, dropna=False).agg(
+            **{by: (by, 'first')},
+            squads=('squad', 'nunique'),
+            **{column: (column, 'sum') for column in self.MATCH_SUMS}
+        ).reset_index(drop=True)
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            merged['win_rate'] = merged['wins'] / merged['matches']
+            scored_matches = merged['scored_matches'].where(merged['scored_matches'] > 0)
+            merged['avg_margin'] = (merged['points_for'] - merged['points_against']) / scored_matches
+            merged['avg_performance'] = merged['score_sum'] / merged['scored'].where(merged['scored'] > 0)
+        return merged.sort_values('matches', ascending=False).reset_index(drop=True)
+
+class StatsServer:
+    """只读的本地 HTTP/JSON 统计服务，供教练在浏览器中查看数据
+    
+    asyncio 事件循环负责连接和 HTTP 解析，查询放到线程池中执行，每个线程从连接池取一个只读连接；
+    数据库切换为 WAL 模式，读取不阻塞管理程序写入。响应按数据库文件版本缓存并带 ETag，
+    相同请求并发未命中时只查询一次；客户端带 If-None-Match 时返回 304。
+    """
+    MAX_HEADER_BYTES = 16384
+    MAX_CACHE_ENTRIES = 512
+    MATCH_FILTERS = ('start_date', 'end_date', 'tournament', 'opponent', 'member_id')
+    SCHEDULE_FILTERS = ('start_date', 'end_date', 'member_id')
+    ROUTES = {
+        '/api/members': ('_members', "全部队员"),
+        '/api/matches': ('_matches', "比赛列表，可按 start_date、end_date、tournament、opponent、member_id 筛选"),
+        '/api/schedule': ('_schedule', "排班，可按 start_date、end_date、member_id 筛选"),
+        '/api/member_stats': ('_member_stats', "队员统计，筛选同比赛列表，include_archived=1 包含已归档赛季"),
+        '/charts/performance.png': ('_performance_chart', "队员平均表现评分图，筛选同队员统计"),
+        '/charts/results.png': ('_results_chart', "比赛结果分布图，筛选同队员统计"),
+    }
+    STATUS_TEXT = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+                   405: 'Method Not Allowed', 500: 'Internal Server Error'}
+    
+    def __init__(self, db_name="debate_team.db", host='127.0.0.1', port=8765, pool_size=4):
+        self.db_name = db_name
+        self.host = host
+        self.port = port
+        
+        # 先以读写方式打开一次完成结构升级，并切换到 WAL（持久设置，管理程序之后也使用 WAL）
+        system = DebateTeamManagementSystem(db_name)
+        system.conn.execute('PRAGMA journal_mode=WAL')
+        system.close_connection()
+        
+        self.pool = queue.Queue()
+        for _ in range(pool_size):
+            self.pool.put(DebateTeamManagementSystem(db_name, read_only=True))
+        self.executor = ThreadPoolExecutor(max_workers=pool_size)
+        self._cache = {}
+        self._cache_version = None
+        self._inflight = {}
+        self.counters = {'requests': 0, 'cache_hits': 0, 'not_modified': 0, 'queries': 0}
+    
+    def data_version(self):
+        """数据库文件及其 WAL 文件的修改时间和大小，任何提交都会改变它"""
+        version = []
+        for path in (self.db_name, self.db_name + '-wal'):
+            try:
+                stat = os.stat(path)
+                version.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                version.append(None)
+        return tuple(version)
+    
+    async def serve(self):
+        """监听端口直到被取消"""
+        server = await asyncio.start_server(self._handle_connection, self.host, self.port,
+                                            limit=self.MAX_HEADER_BYTES, backlog=1024)
+        print(f"统计服务已启动: http://{self.host}:{self.port}/")
+        async with server:
+            await server.serve_forever()
+    
+    def run(self):
         try:
-            result = subprocess.run(['Rscript', 'R_analysis.R'], 
-                                  capture_output=True, text=True)
-            if result.returncode == 0:
-                print("R分析完成，图表已生成")
-            else:
-                print("R脚本执行失败，错误:", result.stderr)
-        except FileNotFoundError:
-            print("R未安装或未添加到PATH中，跳过R分析")
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+    
+    def close(self):
+        self.executor.shutdown(wait=True)
+        while not self.pool.empty():
+            self.pool.get().close_connection()
+    
+    async def _handle_connection(self, reader, writer):
+        """处理一个连接上的请求，HTTP/1.1 默认保持连接"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                
+                request_line, *header_lines = head.decode('utf-8', 'replace').rstrip('\r\n').split('\r\n')
+                parts = request_line.split()
+                if len(parts) != 3:
+                    writer.write(self._response(400, self._json({'error': "无效的请求"}), keep_alive=False))
+                    break
+                method, target, http_version = parts
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection == 'keep-alive' or (http_version == 'HTTP/1.1' and connection != 'close')
+                # 只读服务不接受请求体，其他方法直接关闭连接
+                if method not in ('GET', 'HEAD'):
+                    keep_alive = False
+                
+                status, body, extra = await self.respond(method, target, headers)
+                writer.write(self._response(status, body, extra, keep_alive, head_only=method == 'HEAD'))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+    
+    def _response(self, status, body, extra=None, keep_alive=True, head_only=False):
+        """拼接响应报文，body 为 (content_type, bytes)"""
+        content_type, payload = body if body else ('application/json; charset=utf-8', b'')
+        lines = [f"HTTP/1.1 {status} {self.STATUS_TEXT[status]}",
+                 f"Content-Type: {content_type}",
+                 f"Content-Length: {len(payload)}",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        lines += [f"{name}: {value}" for name, value in (extra or {}).items()]
+        header = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+        return header if head_only or status == 304 else header + payload
+    
+    async def respond(self, method, target, headers):
+        """返回 (状态码, (content_type, bytes), 额外响应头)"""
+        self.counters['requests'] += 1
+        if method not in ('GET', 'HEAD'):
+            return 405, self._json({'error': "只读服务仅支持 GET"}), {'Allow': 'GET, HEAD'}
         
-        return stats_df
+        url = urlsplit(target)
+        path = url.path.rstrip('/') or '/'
+        if path == '/':
+            return 200, self._json({route: description for route, (_, description) in self.ROUTES.items()}), {}
+        if path not in self.ROUTES:
+            return 404, self._json({'error': f"未知路径: {path}"}), {}
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        
+        # 数据库有新提交时整体清空缓存
+        version = self.data_version()
+        if version != self._cache_version:
+            self._cache.clear()
+            self._cache_version = version
+        
+        key = (path, tuple(sorted(params.items())))
+        entry = self._cache.get(key)
+        if entry is None:
+            # 并发的相同请求共用一次查询
+            future = self._inflight.get(key)
+            if future is None:
+                future = asyncio.get_running_loop().run_in_executor(self.executor, self._render, path, params)
+                self._inflight[key] = future
+                future.add_done_callback(lambda _: self._inflight.pop(key, None))
+            try:
+                body = await future
+            except ValueError as e:
+                return 400, self._json({'error': str(e)}), {}
+            except Exception as e:
+                return 500, self._json({'error': str(e)}), {}
+            entry = (f'"{hashlib.sha1(body[1]).hexdigest()[:20]}"', body)
+            if self._cache_version == version:
+                if len(self._cache) >= self.MAX_CACHE_ENTRIES:
+                    self._cache.clear()
+                self._cache[key] = entry
+        else:
+            self.counters['cache_hits'] += 1
+        
+        etag, body = entry
+        extra = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if etag in [tag.strip() for tag in headers.get('if-none-match', '').split(',')]:
+            self.counters['not_modified'] += 1
+            return 304, None, extra
+        return 200, body, extra
     
-    def export_data(self, format_type='csv'):
-        """导出数据"""
-        tables = ['members', 'matches', 'match_participation', 'schedule']
-        for table in tables:
-            df = pd.read_sql_query(f'SELECT * FROM {table}', self.conn)
-            if format_type.lower() == 'csv':
-                df.to_csv(f'{table}_export.csv', index=False)
-            elif format_type.lower() == 'excel':
-                df.to_excel(f'{table}_export.xlsx', index=False)
-        messagebox.showinfo("导出成功", f"数据已导出为{format_type.upper()}格式")
+    def _render(self, path, params):
+        """在线程池中执行：取一个只读连接生成响应内容"""
+        system = self.pool.get()
+        try:
+            self.counters['queries'] += 1
+            return getattr(self, self.ROUTES[path][0])(system, params)
+        finally:
+            self.pool.put(system)
     
-    def close_connection(self):
-        """关闭数据库连接"""
-        self.conn.close()
+    @staticmethod
+    def _json(data):
+        return 'application/json; charset=utf-8', json.dumps(data, ensure_ascii=False).encode('utf-8')
+    
+    @staticmethod
+    def _dataframe(df):
+        return 'application/json; charset=utf-8', df.to_json(orient='records', force_ascii=False).encode('utf-8')
+    
+    @staticmethod
+    def _png(fig):
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png')
+        return 'image/png', buffer.getvalue()
+    
+    def _filters(self, params, keys):
+        """取出允许的筛选参数，日期和队员 ID 先行校验"""
+        filters = {key: params[key] for key in keys if params.get(key)}
+        for key in ('start_date', 'end_date'):
+            if key in filters:
+                datetime.strptime(filters[key], "%Y-%m-%d")
+        if 'member_id' in filters:
+            if not filters['member_id'].isdigit():
+                raise ValueError(f"无效的队员 ID: {filters['member_id']}")
+            filters['member_id'] = int(filters['member_id'])
+        return filters
+    
+    def _include_archived(self, params):
+        return params.get('include_archived', '').lower() in ('1', 'true', 'yes')
+    
+    def _members(self, system, params):
+        return self._dataframe(system.get_all_members())
+    
+    def _matches(self, system, params):
+        return self._dataframe(system.get_all_matches(**self._filters(params, self.MATCH_FILTERS)))
+    
+    def _schedule(self, system, params):
+        return self._dataframe(system.get_schedule(**self._filters(params, self.SCHEDULE_FILTERS)))
+    
+    def _member_stats(self, system, params):
+        return self._dataframe(system.get_member_stats(self._include_archived(params),
+                                                       **self._filters(params, self.MATCH_FILTERS)))
+    
+    def _performance_chart(self, system, params):
+        # 线程中不能使用 pyplot 的全局状态，直接构造 Figure
+        df = system.get_member_stats(self._include_archived(params), **self._filters(params, self.MATCH_FILTERS))
+        df = df.dropna(subset=['avg_performance']).sort_values('avg_performance')
+        fig = Figure(figsize=(8, max(3, 0.3 * len(df))))
+        ax = fig.add_subplot()
+        ax.barh(df['name'], df['avg_performance'], color='steelblue')
+        ax.set_title('队员平均表现评分')
+        ax.set_xlabel('平均表现评分')
+        fig.tight_layout()
+        return self._png(fig)
+    
+    def _results_chart(self, system, params):
+        df = system.get_match_statistics(self._include_archived(params), **self._filters(params, self.MATCH_FILTERS))
+        fig = Figure(figsize=(6, 6))
+        ax = fig.add_subplot()
+        if df.empty:
+            ax.text(0.5, 0.5, '暂无比赛数据', ha='center', va='center')
+            ax.axis('off')
+        else:
+            result_counts = df['result'].value_counts()
+            ax.pie(result_counts.values, labels=result_counts.index, autopct='%1.1f%%')
+        ax.set_title('比赛结果分布')
+        return self._png(fig)
+    
+    @staticmethod
+    def load_test(url, total=2000, concurrency=100, revalidate=False):
+        """压测：concurrency 个保持连接的客户端共发送 total 个 GET 请求，返回每秒请求数和延迟
+        
+        revalidate 为 True 时携带首个响应的 ETag，测试 304 路径。
+        """
+        url = urlsplit(url)
+        host, port = url.hostname, url.port or 80
+        target = (url.path or '/') + (f'?{url.query}' if url.query else '')
+        
+        async def fetch(reader, writer, etag):
+            extra = f"If-None-Match: {etag}\r\n" if etag else ''
+            writer.write(f"GET {target} HTTP/1.1\r\nHost: {host}\r\n{extra}\r\n".encode('latin-1'))
+            await writer.drain()
+            head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1')
+            status = int(head.split(None, 2)[1])
+            headers = dict(line.split(': ', 1) for line in head.rstrip('\r\n').split('\r\n')[1:])
+            await reader.readexactly(int(headers.get('Content-Length', 0)))
+            return status, headers.get('ETag')
+        
+        async def run():
+            etag = None
+            if revalidate:
+                reader, writer = await asyncio.open_connection(host, port)
+                _, etag = await fetch(reader, writer, None)
+                writer.close()
+            
+            remaining = [total]
+            latencies = []
+            statuses = {}
+            errors = [0]
+            
+            async def client():
+                try:
+                    reader, writer = await asyncio.open_connection(host, port, limit=1 << 24)
+                except OSError:
+                    errors[0] += 1
+                    return
+                try:
+                    while remaining[0] > 0:
+                        remaining[0] -= 1
+                        begin = time.perf_counter()
+                        try:
+                            status, _ = await fetch(reader, writer, etag)
+                        except (OSError, asyncio.IncompleteReadError):
+                            errors[0] += 1
+                            return
+                        latencies.append(time.perf_counter() - begin)
+                        statuses[status] = statuses.get(status, 0) + 1
+                finally:
+                    writer.close()
+            
+            start = time.perf_counter()
+            await asyncio.gather(*(client() for _ in range(concurrency)))
+            seconds = time.perf_counter() - start
+            latencies_ms = np.array(latencies) * 1000
+            return {
+                'requests': len(latencies),
+                'concurrency': concurrency,
+                'seconds': seconds,
+                'requests_per_second': len(latencies) / seconds if seconds else 0.0,
+                'p50_ms': float(np.percentile(latencies_ms, 50)) if len(latencies) else None,
+                'p99_ms': float(np.percentile(latencies_ms, 99)) if len(latencies) else None,
+                'statuses': statuses,
+                'errors': errors[0],
+            }
+        
+        return asyncio.run(run())
 
 class DebateTeamApp:
-    def __init__(self, root):
+    # 整场录入表格的行数（四名主辩加替补）
+    BATCH_ROWS = 8
+    # 分析结果每页行数，以及每次 after 回调写入文本框的行数
+    REPORT_PAGE_ROWS = 200
+    REPORT_CHUNK_ROWS = 50
+    
+    def __init__(self, root, db_name="debate_team.db"):
         self.root = root
         self.root.title("辩论队电子信息管理系统")
         self.root.geometry("1000x700")
         
-        self.system = DebateTeamManagementSystem()
+        self.system = DebateTeamManagementSystem(db_name)
         
         self.setup_ui()
         self.load_initial_data()
@@ -297,6 +2988,10 @@ class DebateTeamApp:
         
         ttk.Button(button_frame, text="导出数据", command=self.export_data).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="刷新数据", command=self.refresh_all_tabs).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="归档赛季", command=self.archive_season).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="备份数据", command=self.backup_database).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="恢复备份", command=self.restore_backup).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="同步数据", command=self.sync_database).pack(side=tk.LEFT, padx=5)
     
     def setup_members_tab(self):
         # 输入区域
@@ -413,6 +3108,7 @@ class DebateTeamApp:
         btn_frame.grid(row=3, column=0, columnspan=4, pady=5)
         
         ttk.Button(btn_frame, text="添加比赛", command=self.add_match).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="对手情报", command=self.show_scouting_report).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="重置", command=self.reset_match_form).pack(side=tk.LEFT, padx=5)
         
         # 表格区域
@@ -472,8 +3168,39 @@ class DebateTeamApp:
         btn_frame.grid(row=2, column=0, columnspan=4, pady=5)
         
         ttk.Button(btn_frame, text="记录出战", command=self.record_participation).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="推荐阵容", command=self.recommend_lineups).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="重置", command=self.reset_participation_form).pack(side=tk.LEFT, padx=5)
         
+        # 整场录入：一次填写一场比赛所有队员的角色和评分
+        batch_frame = ttk.LabelFrame(self.participation_frame, text="整场录入")
+        batch_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        ttk.Label(batch_frame, text="比赛:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=2)
+        self.batch_match_var = tk.StringVar()
+        self.batch_match_combo = ttk.Combobox(batch_frame, textvariable=self.batch_match_var, width=40)
+        self.batch_match_combo.grid(row=0, column=1, columnspan=3, sticky=tk.W, padx=5, pady=2)
+        
+        for column, text in enumerate(["队员", "角色", "表现评分"]):
+            ttk.Label(batch_frame, text=text).grid(row=1, column=column, sticky=tk.W, padx=5)
+        
+        self.batch_rows = []
+        default_roles = LineupRecommender.LINEUP_ROLES
+        for index in range(self.BATCH_ROWS):
+            member_var = tk.StringVar()
+            role_var = tk.StringVar(value=default_roles[index] if index < len(default_roles) else "")
+            score_var = tk.StringVar()
+            member_combo = ttk.Combobox(batch_frame, textvariable=member_var, width=20)
+            member_combo.grid(row=index + 2, column=0, padx=5, pady=1)
+            ttk.Combobox(batch_frame, textvariable=role_var, width=8,
+                         values=["一辩", "二辩", "三辩", "四辩", "自由辩"]).grid(row=index + 2, column=1, padx=5, pady=1)
+            ttk.Entry(batch_frame, textvariable=score_var, width=8).grid(row=index + 2, column=2, padx=5, pady=1)
+            self.batch_rows.append((member_var, role_var, score_var, member_combo))
+        
+        batch_btn_frame = ttk.Frame(batch_frame)
+        batch_btn_frame.grid(row=self.BATCH_ROWS + 2, column=0, columnspan=4, pady=5)
+        ttk.Button(batch_btn_frame, text="保存整场", command=self.record_match_participations).pack(side=tk.LEFT, padx=5)
+        ttk.Button(batch_btn_frame, text="清空", command=self.reset_batch_form).pack(side=tk.LEFT, padx=5)
+        
         # 表格区域
         table_frame = ttk.LabelFrame(self.participation_frame, text="出战记录")
         table_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
@@ -554,6 +3281,35 @@ class DebateTeamApp:
         tree_scroll_x.pack(side=tk.BOTTOM, fill=tk.X)
     
     def setup_analysis_tab(self):
+        # 筛选条件
+        filter_frame = ttk.LabelFrame(self.analysis_frame, text="筛选条件")
+        filter_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        ttk.Label(filter_frame, text="开始日期:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=2)
+        self.filter_start_var = tk.StringVar()
+        ttk.Entry(filter_frame, textvariable=self.filter_start_var, width=12).grid(row=0, column=1, padx=5, pady=2)
+        
+        ttk.Label(filter_frame, text="结束日期:").grid(row=0, column=2, sticky=tk.W, padx=5, pady=2)
+        self.filter_end_var = tk.StringVar()
+        ttk.Entry(filter_frame, textvariable=self.filter_end_var, width=12).grid(row=0, column=3, padx=5, pady=2)
+        
+        ttk.Label(filter_frame, text="锦标赛:").grid(row=0, column=4, sticky=tk.W, padx=5, pady=2)
+        self.filter_tournament_var = tk.StringVar()
+        self.filter_tournament_combo = ttk.Combobox(filter_frame, textvariable=self.filter_tournament_var, width=14)
+        self.filter_tournament_combo.grid(row=0, column=5, padx=5, pady=2)
+        
+        ttk.Label(filter_frame, text="对手:").grid(row=1, column=0, sticky=tk.W, padx=5, pady=2)
+        self.filter_opponent_var = tk.StringVar()
+        self.filter_opponent_combo = ttk.Combobox(filter_frame, textvariable=self.filter_opponent_var, width=14)
+        self.filter_opponent_combo.grid(row=1, column=1, padx=5, pady=2)
+        
+        ttk.Label(filter_frame, text="队员:").grid(row=1, column=2, sticky=tk.W, padx=5, pady=2)
+        self.filter_member_var = tk.StringVar()
+        self.filter_member_combo = ttk.Combobox(filter_frame, textvariable=self.filter_member_var, width=14)
+        self.filter_member_combo.grid(row=1, column=3, padx=5, pady=2)
+        
+        ttk.Button(filter_frame, text="清除筛选", command=self.reset_analysis_filters).grid(row=1, column=5, padx=5, pady=2)
+        
         # 分析按钮
         btn_frame = ttk.Frame(self.analysis_frame)
         btn_frame.pack(fill=tk.X, padx=5, pady=5)
@@ -561,6 +3317,11 @@ class DebateTeamApp:
         ttk.Button(btn_frame, text="生成能力评估报告", command=self.generate_performance_report).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="生成比赛统计图", command=self.generate_match_statistics).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="生成排班表", command=self.generate_schedule_report).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="多维统计", command=self.generate_cube_report).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="模拟锦标赛", command=self.simulate_tournament).pack(side=tk.LEFT, padx=5)
+        
+        self.include_archived_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(btn_frame, text="包含已归档赛季", variable=self.include_archived_var).pack(side=tk.LEFT, padx=5)
         
         # 结果显示区域
         result_frame = ttk.LabelFrame(self.analysis_frame, text="分析结果")
@@ -570,8 +3331,32 @@ class DebateTeamApp:
         text_scroll = ttk.Scrollbar(result_frame, orient=tk.VERTICAL, command=self.analysis_text.yview)
         self.analysis_text.configure(yscrollcommand=text_scroll.set)
         
+        # 表格型报告的排序、翻页和导出
+        report_bar = ttk.Frame(result_frame)
+        report_bar.pack(side=tk.BOTTOM, fill=tk.X)
+        
+        ttk.Label(report_bar, text="排序:").pack(side=tk.LEFT, padx=5)
+        self.report_sort_var = tk.StringVar()
+        self.report_sort_combo = ttk.Combobox(report_bar, textvariable=self.report_sort_var, width=16, state='readonly')
+        self.report_sort_combo.pack(side=tk.LEFT, padx=5)
+        self.report_sort_combo.bind('<<ComboboxSelected>>', lambda event: self.sort_report())
+        self.report_descending_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(report_bar, text="降序", variable=self.report_descending_var,
+                        command=self.sort_report).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(report_bar, text="上一页", command=lambda: self.show_report_page(self.report_page - 1)).pack(side=tk.LEFT, padx=5)
+        self.report_page_label = ttk.Label(report_bar, text="")
+        self.report_page_label.pack(side=tk.LEFT, padx=5)
+        ttk.Button(report_bar, text="下一页", command=lambda: self.show_report_page(self.report_page + 1)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(report_bar, text="导出报告", command=self.export_report).pack(side=tk.RIGHT, padx=5)
+        
         self.analysis_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         text_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        self.report_df = None
+        self.report_title = ""
+        self.report_page = 0
+        self._report_job = None
     
     def load_initial_data(self):
         # 加载初始数据到所有表格
@@ -579,6 +3364,7 @@ class DebateTeamApp:
         self.refresh_matches_tab()
         self.refresh_participation_tab()
         self.refresh_schedule_tab()
+        self.refresh_analysis_filters()
     
     def refresh_members_tab(self):
         # 清空现有数据
@@ -631,8 +3417,12 @@ class DebateTeamApp:
         members_df = self.system.get_all_members()
         self.part_member_combo['values'] = [f"{row['name']} (ID: {row['id']})" for _, row in members_df.iterrows()]
         
+        for _, _, _, member_combo in self.batch_rows:
+            member_combo['values'] = self.part_member_combo['values']
+        
         matches_df = self.system.get_all_matches()
         self.part_match_combo['values'] = [f"{row['opponent']} ({row['date']}) ID: {row['id']}" for _, row in matches_df.iterrows()]
+        self.batch_match_combo['values'] = self.part_match_combo['values']
     
     def refresh_schedule_tab(self):
         # 清空现有数据
@@ -655,6 +3445,32 @@ class DebateTeamApp:
         self.refresh_matches_tab()
         self.refresh_participation_tab()
         self.refresh_schedule_tab()
+        self.refresh_analysis_filters()
+    
+    def refresh_analysis_filters(self):
+        # 更新筛选下拉菜单
+        self.filter_tournament_combo['values'] = self.system.get_tournaments()
+        self.filter_opponent_combo['values'] = self.system.get_opponents()
+        members_df = self.system.get_all_members()
+        self.filter_member_combo['values'] = [f"{row['name']} (ID: {row['id']})" for _, row in members_df.iterrows()]
+    
+    def reset_analysis_filters(self):
+        self.filter_start_var.set("")
+        self.filter_end_var.set("")
+        self.filter_tournament_var.set("")
+        self.filter_opponent_var.set("")
+        self.filter_member_var.set("")
+    
+    def get_analysis_filters(self):
+        # 收集筛选条件，空值表示不筛选
+        member_str = self.filter_member_var.get()
+        return {
+            'start_date': self.filter_start_var.get() or None,
+            'end_date': self.filter_end_var.get() or None,
+            'tournament': self.filter_tournament_var.get() or None,
+            'opponent': self.filter_opponent_var.get() or None,
+            'member_id': int(member_str.split('ID: ')[1]) if member_str else None,
+        }
     
     def on_member_select(self, event):
         selection = self.members_tree.selection()
@@ -766,6 +3582,35 @@ class DebateTeamApp:
         except Exception as e:
             messagebox.showerror("错误", f"添加比赛失败: {str(e)}")
     
+    def show_scouting_report(self):
+        opponent = self.match_opponent_var.get()
+        if not opponent:
+            messagebox.showwarning("警告", "请填写对手")
+            return
+        
+        try:
+            report = self.system.get_scouting_report(opponent)
+            if report is None:
+                messagebox.showinfo("提示", f"暂无与 {opponent} 的比赛记录")
+                return
+            
+            def fmt(value):
+                return "-" if value is None else f"{round(value, 2):g}"
+            
+            lines = [
+                f"对手: {report['opponent']}",
+                f"战绩: {report['wins']}胜 {report['losses']}负 {report['draws']}平（共 {report['matches']} 场）",
+                f"平均分差: {fmt(report['avg_margin'])}  "
+                f"最大胜分: {fmt(report['best_margin'])}  最大负分: {fmt(report['worst_margin'])}",
+                f"近期状态: {report['recent_form'] or '-'}（最近一场 {report['last_match_date']}）",
+                "表现最佳队员:",
+            ]
+            for member in report['best_members']:
+                lines.append(f"  {member['name']}: 平均 {member['avg_performance']:.2f}（{member['appearances']} 场）")
+            messagebox.showinfo("对手情报", "\n".join(lines))
+        except Exception as e:
+            messagebox.showerror("错误", f"获取对手情报失败: {str(e)}")
+    
     def reset_match_form(self):
         self.match_date_var.set(datetime.now().strftime("%Y-%m-%d"))
         self.match_opponent_var.set("")
@@ -795,6 +3640,84 @@ class DebateTeamApp:
         except Exception as e:
             messagebox.showerror("错误", f"记录出战失败: {str(e)}")
     
+    def recommend_lineups(self):
+        match_str = self.part_match_var.get()
+        
+        try:
+            # 选择了比赛时按比赛日期考虑排班
+            match_date = None
+            if match_str:
+                match_id = int(match_str.split('ID: ')[1])
+                match_date = self.system.cursor.execute(
+                    "SELECT date FROM matches WHERE id = ?", (match_id,)).fetchone()[0]
+            
+            lineups = self.system.recommend_lineups(k=3, match_date=match_date)
+            lines = []
+            for rank, lineup in enumerate(lineups, 1):
+                lines.append(f"方案{rank}（期望总分 {lineup['total']:.2f}）")
+                for role, member_id, name, expected in lineup['lineup']:
+                    lines.append(f"  {role}: {name} (ID: {member_id})  {expected:.2f}")
+            messagebox.showinfo("推荐阵容", "\n".join(lines))
+        except Exception as e:
+            messagebox.showerror("错误", f"推荐阵容失败: {str(e)}")
+    
+    def record_match_participations(self):
+        match_str = self.batch_match_var.get()
+        if not match_str:
+            messagebox.showwarning("警告", "请选择比赛")
+            return
+        
+        try:
+            match_id = int(match_str.split('ID: ')[1])
+            entries = []
+            names = []
+            grid_rows = []
+            for grid_index, (member_var, role_var, score_var, _) in enumerate(self.batch_rows):
+                member_str = member_var.get()
+                if not member_str:
+                    continue
+                role = role_var.get()
+                if not role:
+                    raise ValueError(f"请为 {member_str} 选择角色")
+                score_str = score_var.get().strip()
+                score = float(score_str) if score_str else None
+                if score is not None and not 0 <= score <= 10:
+                    raise ValueError(f"{member_str} 的评分应在 0-10 之间")
+                entries.append((int(member_str.split('ID: ')[1]), role, score))
+                names.append(member_str.split(' (ID: ')[0])
+                grid_rows.append(grid_index + 1)
+            
+            if not entries:
+                messagebox.showwarning("警告", "请至少填写一名队员")
+                return
+            
+            # 保存前先在内存中检查重复，避免提交后才发现
+            duplicates = self.system.find_duplicate_participations(match_id, [entry[0] for entry in entries])
+            if duplicates:
+                rows = [str(grid_rows[index]) for index in duplicates]
+                messagebox.showwarning("警告", f"第 {', '.join(rows)} 行的队员在该场比赛中已有记录或重复填写")
+                return
+            
+            ids = self.system.record_match_participations(match_id, entries)
+            
+            # 只追加新记录，不重新加载整张表
+            match_info = match_str.rsplit(' ID: ', 1)[0]
+            for participation_id, name, (_, role, score) in zip(ids, names, entries):
+                self.participation_tree.insert('', tk.END, values=[participation_id, name, match_info, role,
+                                                                   "" if score is None else score])
+            self.reset_batch_form()
+            messagebox.showinfo("成功", f"已保存 {len(ids)} 条出战记录")
+        except Exception as e:
+            messagebox.showerror("错误", f"整场录入失败: {str(e)}")
+    
+    def reset_batch_form(self):
+        default_roles = LineupRecommender.LINEUP_ROLES
+        self.batch_match_var.set("")
+        for index, (member_var, role_var, score_var, _) in enumerate(self.batch_rows):
+            member_var.set("")
+            role_var.set(default_roles[index] if index < len(default_roles) else "")
+            score_var.set("")
+    
     def reset_participation_form(self):
         self.part_member_var.set("")
         self.part_match_var.set("")
@@ -830,35 +3753,99 @@ class DebateTeamApp:
     
     def generate_performance_report(self):
         try:
-            df = self.system.generate_performance_report()
+            filters = self.get_analysis_filters()
+            df = self.system.generate_performance_report(self.include_archived_var.get(), **filters)
+            self.warn_missing_archives()
             
             # 显示结果
-            self.analysis_text.delete(1.0, tk.END)
-            self.analysis_text.insert(tk.END, "=== 队员能力评估报告 ===\n\n")
-            self.analysis_text.insert(tk.END, df.to_string(index=False))
+            self.show_report("队员能力评估报告", df)
             
             messagebox.showinfo("成功", "能力评估报告已生成")
         except Exception as e:
             messagebox.showerror("错误", f"生成报告失败: {str(e)}")
     
+    def warn_missing_archives(self):
+        if self.include_archived_var.get() and self.system.missing_archives:
+            messagebox.showwarning("警告", "以下赛季的归档文件不存在，报告未包含这些赛季:\n"
+                                   + "\n".join(self.system.missing_archives))
+    
+    def show_report(self, title, df):
+        """显示表格型报告：按页分块写入文本框，保留完整数据供排序和导出"""
+        self.report_title = title
+        self.report_df = df.reset_index(drop=True)
+        self.report_sort_combo['values'] = list(df.columns)
+        self.report_sort_var.set("")
+        self.show_report_page(0)
+    
+    def clear_report(self):
+        """切换到非表格输出时停止分块写入并清空报告状态"""
+        if self._report_job is not None:
+            self.root.after_cancel(self._report_job)
+            self._report_job = None
+        self.report_df = None
+        self.report_sort_combo['values'] = []
+        self.report_sort_var.set("")
+        self.report_page_label.config(text="")
+    
+    def sort_report(self):
+        column = self.report_sort_var.get()
+        if self.report_df is None or not column:
+            return
+        self.report_df = self.report_df.sort_values(column, ascending=not self.report_descending_var.get(),
+                                                    na_position='last', kind='mergesort').reset_index(drop=True)
+        self.show_report_page(0)
+    
+    def show_report_page(self, page):
+        if self.report_df is None:
+            return
+        page_count = max(1, -(-len(self.report_df) // self.REPORT_PAGE_ROWS))
+        self.report_page = min(max(page, 0), page_count - 1)
+        self.report_page_label.config(text=f"第 {self.report_page + 1}/{page_count} 页，共 {len(self.report_df)} 行")
+        
+        # 只格式化当前页，列宽在页内对齐
+        start = self.report_page * self.REPORT_PAGE_ROWS
+        page_df = self.report_df.iloc[start:start + self.REPORT_PAGE_ROWS]
+        lines = page_df.to_string(index=False).split('\n')
+        
+        if self._report_job is not None:
+            self.root.after_cancel(self._report_job)
+        self.analysis_text.delete(1.0, tk.END)
+        self.analysis_text.insert(tk.END, f"=== {self.report_title} ===\n\n")
+        self._report_job = self.root.after(0, self._insert_report_lines, lines, 0)
+    
+    def _insert_report_lines(self, lines, position):
+        """每次写入一小块行后让出事件循环，大报告也不会卡住界面"""
+        chunk = lines[position:position + self.REPORT_CHUNK_ROWS]
+        self.analysis_text.insert(tk.END, '\n'.join(chunk) + '\n')
+        position += self.REPORT_CHUNK_ROWS
+        if position < len(lines):
+            self._report_job = self.root.after(1, self._insert_report_lines, lines, position)
+        else:
+            self._report_job = None
+    
+    def export_report(self):
+        if self.report_df is None:
+            messagebox.showwarning("警告", "请先生成报告")
+            return
+        path = filedialog.asksaveasfilename(
+            title="导出报告",
+            defaultextension=".html",
+            filetypes=[("HTML 文件", "*.html"), ("CSV 文件", "*.csv")]
+        )
+        if not path:
+            return
+        try:
+            self.system.export_report(self.report_df, path, self.report_title)
+            messagebox.showinfo("成功", f"报告已导出到 {path}")
+        except Exception as e:
+            messagebox.showerror("错误", f"导出报告失败: {str(e)}")
+    
     def generate_match_statistics(self):
         try:
             # 获取比赛统计数据
-            query = '''
-                SELECT 
-                    m.date,
-                    m.opponent,
-                    m.tournament,
-                    m.result,
-                    m.score,
-                    COUNT(mp.id) as participants_count,
-                    AVG(mp.performance_score) as avg_performance
-                FROM matches m
-                LEFT JOIN match_participation mp ON m.id = mp.match_id
-                GROUP BY m.id
-                ORDER BY m.date DESC
-            '''
-            df = pd.read_sql_query(query, self.system.conn)
+            filters = self.get_analysis_filters()
+            df = self.system.get_match_statistics(self.include_archived_var.get(), **filters)
+            self.warn_missing_archives()
             
             if df.empty:
                 messagebox.showinfo("提示", "暂无比赛数据")
@@ -873,7 +3860,6 @@ class DebateTeamApp:
             axes[0, 0].set_title('比赛结果分布')
             
             # 比赛时间趋势
-            df['date'] = pd.to_datetime(df['date'])
             df_sorted = df.sort_values('date')
             axes[0, 1].plot(df_sorted['date'], range(len(df_sorted)), marker='o')
             axes[0, 1].set_title('比赛时间线')
@@ -901,9 +3887,87 @@ class DebateTeamApp:
         except Exception as e:
             messagebox.showerror("错误", f"生成统计图失败: {str(e)}")
     
+    def generate_cube_report(self):
+        try:
+            filters = self.get_analysis_filters()
+            include_archived = self.include_archived_var.get()
+            
+            # 内存立方体只含主库数据、按月汇总且没有对手维度；设置了对手、日期或包含归档时
+            # 改为按筛选条件从数据库构建，结果与其他报表一致
+            cube_filters = {}
+            if include_archived or filters['opponent'] or filters['start_date'] or filters['end_date']:
+                cube = self.system.build_stats_cube(include_archived, **filters)
+            else:
+                cube = self.system.get_stats_cube()
+                if filters['tournament']:
+                    cube_filters['tournament'] = filters['tournament']
+                if filters['member_id']:
+                    cube_filters['member'] = filters['member_id']
+            
+            df = cube.rollup(('member', 'role'), **cube_filters)
+            names = dict(self.system.conn.execute('SELECT id, name FROM members_data').fetchall())
+            df.insert(1, 'name', df['member'].map(names))
+            
+            self.show_report("队员 × 角色 多维统计", df)
+        except Exception as e:
+            messagebox.showerror("错误", f"生成多维统计失败: {str(e)}")
+    
+    def simulate_tournament(self):
+        if getattr(self, 'simulation_thread', None) is not None and self.simulation_thread.is_alive():
+            messagebox.showinfo("提示", "模拟正在进行中")
+            return
+        
+        bracket_str = simpledialog.askstring(
+            "模拟锦标赛",
+            f"按对阵顺序输入参赛队伍，用逗号分隔，我方写作\"{TournamentSimulator.OUR_TEAM}\"（队伍数需为 2 的幂）:",
+            parent=self.root
+        )
+        if not bracket_str:
+            return
+        trials = simpledialog.askinteger("模拟锦标赛", "模拟次数:", initialvalue=200000, minvalue=1000, parent=self.root)
+        if not trials:
+            return
+        
+        try:
+            bracket = [team.strip() for team in re.split(r'[,，]', bracket_str) if team.strip()]
+            # 我方阵容取推荐的最优阵容，队员不足时按全队平均水平
+            try:
+                lineup = [member_id for _, member_id, _, _ in self.system.recommend_lineups(k=1)[0]['lineup']]
+            except ValueError:
+                lineup = None
+            
+            self.simulation_thread = self.system.start_tournament_simulation(
+                bracket, trials, lineup, include_archived=self.include_archived_var.get())
+            self.clear_report()
+            self.analysis_text.delete(1.0, tk.END)
+            self.analysis_text.insert(tk.END, "=== 锦标赛模拟 ===\n\n正在模拟，请稍候...\n")
+            self.root.after(100, self.check_simulation)
+        except Exception as e:
+            messagebox.showerror("错误", f"模拟锦标赛失败: {str(e)}")
+    
+    def check_simulation(self):
+        # 在界面线程中轮询后台模拟，避免跨线程操作Tk
+        if self.simulation_thread.is_alive():
+            self.root.after(100, self.check_simulation)
+            return
+        
+        if self.system.last_simulation_error is not None:
+            messagebox.showerror("错误", f"模拟锦标赛失败: {str(self.system.last_simulation_error)}")
+            return
+        
+        result = self.system.last_simulation_result
+        self.clear_report()
+        self.analysis_text.delete(1.0, tk.END)
+        self.analysis_text.insert(tk.END, "=== 锦标赛模拟 ===\n\n")
+        self.analysis_text.insert(tk.END, result['probabilities'].to_string(float_format=lambda x: f"{x:.3f}"))
+        self.analysis_text.insert(tk.END, f"\n\n模拟 {result['trials']} 次，用时 {result['seconds']:.2f} 秒，"
+                                          f"每秒 {result['trials_per_second']:,.0f} 次"
+                                          f"（另有进程启动 {result['startup_seconds']:.2f} 秒）\n")
+    
     def generate_schedule_report(self):
         try:
-            df = self.system.get_schedule()
+            filters = self.get_analysis_filters()
+            df = self.system.get_schedule(filters['start_date'], filters['end_date'], filters['member_id'])
             
             if df.empty:
                 messagebox.showinfo("提示", "暂无排班数据")
@@ -964,6 +4028,89 @@ class DebateTeamApp:
         except Exception as e:
             messagebox.showerror("错误", f"生成排班表失败: {str(e)}")
     
+    def archive_season(self):
+        name = simpledialog.askstring("归档赛季", "赛季名称:", parent=self.root)
+        if not name:
+            return
+        start_date = simpledialog.askstring("归档赛季", "开始日期 (YYYY-MM-DD):", parent=self.root)
+        end_date = simpledialog.askstring("归档赛季", "结束日期 (YYYY-MM-DD):", parent=self.root)
+        if not all([start_date, end_date]):
+            messagebox.showwarning("警告", "请填写赛季日期范围")
+            return
+        
+        try:
+            summary = self.system.archive_season(name, start_date, end_date)
+            self.refresh_all_tabs()
+            messagebox.showinfo("成功", f"赛季 {name} 已归档: {summary['matches']} 场比赛、"
+                                      f"{summary['match_participation']} 条出战记录、"
+                                      f"{summary['schedule']} 条排班\n归档文件: {summary['archive_file']}")
+        except Exception as e:
+            messagebox.showerror("错误", f"归档赛季失败: {str(e)}")
+    
+    def backup_database(self):
+        if getattr(self, 'backup_thread', None) is not None and self.backup_thread.is_alive():
+            messagebox.showinfo("提示", "备份正在进行中")
+            return
+        
+        try:
+            self.backup_thread = self.system.start_backup()
+            self.root.after(100, self.check_backup)
+        except Exception as e:
+            messagebox.showerror("错误", f"备份失败: {str(e)}")
+    
+    def check_backup(self):
+        # 在界面线程中轮询后台备份，避免跨线程操作Tk
+        if self.backup_thread.is_alive():
+            self.root.after(100, self.check_backup)
+            return
+        
+        if self.system.last_backup_error is not None:
+            messagebox.showerror("错误", f"备份失败: {str(self.system.last_backup_error)}")
+            return
+        
+        report = self.system.last_backup_report
+        messagebox.showinfo("成功", f"备份已保存: {report['backup_file']}\n"
+                                  f"吞吐量: {report['throughput_mb_s']:.1f} MB/s，"
+                                  f"写入最长阻塞: {report['writer_blocked_max_ms']:.1f} ms")
+    
+    def restore_backup(self):
+        backups = self.system.list_backups()
+        backup_file = filedialog.askopenfilename(
+            title="选择备份",
+            initialdir=os.path.dirname(backups[0]) if backups else None,
+            filetypes=[("压缩备份", "*.db.gz"), ("数据库", "*.db")]
+        )
+        if not backup_file:
+            return
+        
+        confirm = messagebox.askyesno("确认", "恢复备份将覆盖当前所有数据，确定继续吗？")
+        if not confirm:
+            return
+        
+        try:
+            seconds = self.system.restore_backup(backup_file)
+            self.refresh_all_tabs()
+            messagebox.showinfo("成功", f"备份已恢复，用时 {seconds:.2f} 秒")
+        except Exception as e:
+            messagebox.showerror("错误", f"恢复备份失败: {str(e)}")
+    
+    def sync_database(self):
+        other_db = filedialog.askopenfilename(
+            title="选择要同步的数据库",
+            filetypes=[("数据库", "*.db")]
+        )
+        if not other_db:
+            return
+        
+        try:
+            summary = self.system.sync_with(other_db)
+            self.refresh_all_tabs()
+            messagebox.showinfo("成功", f"同步完成: 发送 {summary['sent']} 条变更，"
+                                      f"接收 {summary['received']} 条变更，"
+                                      f"应用 {summary['received_applied']} 条")
+        except Exception as e:
+            messagebox.showerror("错误", f"同步失败: {str(e)}")
+    
     def export_data(self):
         format_type = messagebox.askquestion("导出格式", "选择导出格式:\n是 - CSV\n否 - Excel")
         format_choice = 'csv' if format_type == 'yes' else 'excel'
@@ -976,8 +4123,86 @@ class DebateTeamApp:
         self.system.close_connection()
 
 def main():
+    parser = argparse.ArgumentParser(description="辩论队电子信息管理系统")
+    parser.add_argument('--db', default='debate_team.db', help="数据库文件")
+    subparsers = parser.add_subparsers(dest='command')
+    
+    sync_parser = subparsers.add_parser('sync', help="与另一个数据库文件增量同步")
+    sync_parser.add_argument('other_db', help="对端数据库文件")
+    
+    serve_parser = subparsers.add_parser('serve', help="启动只读的本地 HTTP/JSON 统计服务")
+    serve_parser.add_argument('--host', default='127.0.0.1', help="监听地址")
+    serve_parser.add_argument('--port', type=int, default=8765, help="监听端口")
+    serve_parser.add_argument('--pool', type=int, default=4, help="只读连接数")
+    
+    load_parser = subparsers.add_parser('loadtest', help="对统计服务进行压测并报告每秒请求数")
+    load_parser.add_argument('url', nargs='?', default='http://127.0.0.1:8765/api/member_stats', help="请求地址")
+    load_parser.add_argument('--requests', type=int, default=2000, help="请求总数")
+    load_parser.add_argument('--concurrency', type=int, default=100, help="并发连接数")
+    load_parser.add_argument('--revalidate', action='store_true', help="携带 ETag，测试 304 响应")
+    
+    federate_parser = subparsers.add_parser('federate', help="并行汇总多支队伍的数据库文件")
+    federate_parser.add_argument('db_files', nargs='+',
+                                 help="各队数据库文件，可写作 队伍名=文件 指定队伍名")
+    federate_parser.add_argument('--processes', type=int, default=None, help="工作进程数，0 表示不使用多进程")
+    federate_parser.add_argument('--include-archived', action='store_true', help="包含已归档赛季")
+    federate_parser.add_argument('--start-date', help="开始日期")
+    federate_parser.add_argument('--end-date', help="结束日期")
+    federate_parser.add_argument('--member-map', help="队员对应表 CSV（列 squad、member_id、person），"
+                                                      "同一 person 的队员跨队伍合并")
+    federate_parser.add_argument('--output', help="将队员排行、锦标赛和对手汇总导出为以此为前缀的 CSV 文件")
+    
+    args = parser.parse_args()
+    
+    if args.command == 'federate':
+        mapping = TeamFederation.load_member_mapping(args.member_map) if args.member_map else None
+        db_files = args.db_files
+        pairs = [db_file.split('=', 1) for db_file in db_files if '=' in db_file and not os.path.exists(db_file)]
+        if pairs:
+            if len(pairs) != len(db_files):
+                raise SystemExit("指定队伍名时每个文件都需写作 队伍名=文件")
+            names = [name for name, _ in pairs]
+            if len(set(names)) != len(names):
+                raise SystemExit("队伍名重复")
+            db_files = dict(pairs)
+        federation = TeamFederation(db_files, args.processes, mapping)
+        result = federation.collect(args.include_archived, start_date=args.start_date, end_date=args.end_date)
+        print("=== 各文件耗时 ===")
+        print(result['files'].to_string(index=False))
+        print(f"\n共 {len(args.db_files)} 个文件，总用时 {result['seconds']:.2f} 秒\n")
+        print("=== 全俱乐部队员排行 ===")
+        print(result['members'].head(20).to_string(index=False))
+        if args.output:
+            for name in ('members', 'tournaments', 'opponents', 'files'):
+                result[name].to_csv(f"{args.output}_{name}.csv", index=False)
+        return
+    
+    if args.command == 'serve':
+        StatsServer(args.db, args.host, args.port, args.pool).run()
+        return
+    
+    if args.command == 'loadtest':
+        report = StatsServer.load_test(args.url, args.requests, args.concurrency, args.revalidate)
+        print(f"{report['requests']} 个请求，并发 {report['concurrency']}，用时 {report['seconds']:.2f} 秒，"
+              f"每秒 {report['requests_per_second']:,.0f} 个请求")
+        if report['requests']:
+            print(f"延迟 p50 {report['p50_ms']:.1f} ms，p99 {report['p99_ms']:.1f} ms，"
+                  f"状态码 {report['statuses']}，错误 {report['errors']}")
+        return
+    
+    if args.command == 'sync':
+        system = DebateTeamManagementSystem(args.db)
+        try:
+            summary = system.sync_with(args.other_db)
+        finally:
+            system.close_connection()
+        print(f"同步完成: 发送 {summary['sent']} 条（应用 {summary['sent_applied']} 条），"
+              f"接收 {summary['received']} 条（应用 {summary['received_applied']} 条），"
+              f"用时 {summary['seconds']:.3f} 秒")
+        return
+    
     root = tk.Tk()
-    app = DebateTeamApp(root)
+    app = DebateTeamApp(root, args.db)
     app.run()
 
 if __name__ == "__main__":
@@ -0,0 +1,92 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main_system import DebateTeamManagementSystem
+
+
+class SyncOpponentFilterTest(unittest.TestCase):
+    """同步进来的比赛按规范化对手筛选"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_a = os.path.join(self.tmpdir, 'a.db')
+        self.db_b = os.path.join(self.tmpdir, 'b.db')
+        system = DebateTeamManagementSystem(self.db_a)
+        system.add_member('张三', '一辩', '2024-09-01', '新手')
+        system.close_connection()
+        shutil.copy(self.db_a, self.db_b)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_filter_by_opponent_after_sync(self):
+        b = DebateTeamManagementSystem(self.db_b)
+        b.add_match('2024-10-01', '北京 大学', '华语辩论赛', 'Win', '3:1')
+        match_id = b.conn.execute('SELECT id FROM matches_data').fetchone()[0]
+        member_id = b.conn.execute('SELECT id FROM members_data').fetchone()[0]
+        b.record_participation(member_id, match_id, '一辩', 8.5)
+        b.close_connection()
+
+        a = DebateTeamManagementSystem(self.db_a)
+        a.add_match('2024-09-15', '北京大学', '华语辩论赛', 'Loss', '1:3')
+        a.sync_with(self.db_b)
+
+        self.assertEqual(len(a.get_all_matches(opponent='北京大学')), 2)
+        stats = a.get_member_stats(opponent='北京大学')
+        self.assertEqual(stats['matches_played'].tolist(), [1])
+        self.assertEqual(stats['wins'].tolist(), [1])
+        a.close_connection()
+
+        # 只读连接（统计服务、联合统计）无法重建对手维度，同样要能筛选到
+        reader = DebateTeamManagementSystem(self.db_a, read_only=True)
+        self.assertEqual(len(reader.get_match_statistics(opponent='北京大学')), 2)
+        reader.close_connection()
+
+
+class SyncArchivedSeasonTest(unittest.TestCase):
+    """归档后的行不会被对端的同步（全量快照）重新插入主库"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_a = os.path.join(self.tmpdir, 'a.db')
+        self.db_b = os.path.join(self.tmpdir, 'b.db')
+        system = DebateTeamManagementSystem(self.db_a)
+        system.add_member('张三', '一辩', '2023-09-01', '新手')
+        system.add_match('2023-10-01', '北京大学', '华语辩论赛', 'Win', '3:1')
+        member_id = system.conn.execute('SELECT id FROM members_data').fetchone()[0]
+        match_id = system.conn.execute('SELECT id FROM matches_data').fetchone()[0]
+        system.record_participation(member_id, match_id, '一辩', 8.0)
+        system.close_connection()
+        shutil.copy(self.db_a, self.db_b)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_archived_rows_stay_archived_after_sync(self):
+        b = DebateTeamManagementSystem(self.db_b)
+        member_id = b.conn.execute('SELECT id FROM members_data').fetchone()[0]
+        match_id = b.conn.execute('SELECT id FROM matches_data').fetchone()[0]
+        # 对端在归档前的副本上修改这场比赛，变更由触发器写入日志
+        b.conn.execute('UPDATE matches_data SET score_against = 0 WHERE id = ?', (match_id,))
+        b.conn.commit()
+        b.close_connection()
+
+        a = DebateTeamManagementSystem(self.db_a)
+        a.archive_season('2023', '2023-09-01', '2023-12-31')
+        a.sync_with(self.db_b)
+
+        self.assertEqual(a.conn.execute('SELECT COUNT(*) FROM matches_data').fetchone()[0], 0)
+        self.assertEqual(a.conn.execute('SELECT COUNT(*) FROM match_participation_data').fetchone()[0], 0)
+        stats = a.get_member_stats(include_archived=True)
+        self.assertEqual(stats.loc[stats['id'] == member_id, 'matches_played'].tolist(), [1])
+        self.assertEqual(stats.loc[stats['id'] == member_id, 'wins'].tolist(), [1])
+        a.close_connection()
+
+
+if __name__ == '__main__':
+    unittest.main()